@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
-from app.core.auth import verify_jwt
+from app.core.auth import require_scope, verify_jwt
+from app.services.agent.llm import llm_flights
+from app.services.agent.llm_cache import get_llm_cache
+from app.services.agent.llm_scheduler import get_llm_scheduler
 
 router = APIRouter(
     tags=["home"],
@@ -23,3 +26,13 @@ async def read_root():
 @router.get("/me")
 def me(claims=Depends(verify_jwt)):
     return claims
+
+
+@router.get("/llm/stats")
+def llm_stats(claims=Depends(require_scope("read:stats"))):
+    cache = get_llm_cache()
+    return {
+        "cache": cache.stats() if cache else {"enabled": False},
+        "single_flight": llm_flights.stats(),
+        "scheduler": get_llm_scheduler().stats(),
+    }
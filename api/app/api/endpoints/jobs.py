@@ -1,17 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session as OrmSession
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import verify_jwt
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.dependencies import get_async_processing_service, get_user_service
 from app.enums import JobStatus
 from app.models.message import Message
 from app.schemas.job import JobStatusResponse
 from app.schemas.message import MessageOut
+from app.services.agent.async_processing_service import AsyncProcessingService
+from app.services.agent.job_events import (
+    announce_cancelled,
+    job_completions,
+    job_events,
+)
 from app.services.domain.job_service import get_job_with_messages
-from app.services.domain.user_service import UserService
+from app.services.domain.user_service import AsyncUserService
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+SSE_KEEPALIVE_SECONDS = 15
+MAX_STATUS_WAIT_SECONDS = 60
+# Completion events are in-process only; re-check the database this often so
+# jobs finished by an external worker are still noticed
+STATUS_RECHECK_SECONDS = 5
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.GENERATING)
+
 
 def _to_message_out(m: Message) -> MessageOut:
     return MessageOut(
@@ -28,32 +49,66 @@ def _to_message_out(m: Message) -> MessageOut:
     )
 
 
+async def wait_for_job(
+    db: AsyncSession, job, completed: asyncio.Event, wait: float
+) -> None:
+    """
+    Wait up to `wait` seconds for an active job to finish, refreshing `job`.
+    `completed` must come from job_completions.watch() entered before the job
+    was read (or committed), so an early completion is not missed.
+    """
+    deadline = time.monotonic() + wait
+    while (
+        job.status in ACTIVE_STATUSES and (remaining := deadline - time.monotonic()) > 0
+    ):
+        # End the transaction so the connection is free while the request is parked
+        await db.commit()
+        try:
+            await asyncio.wait_for(
+                completed.wait(), timeout=min(remaining, STATUS_RECHECK_SECONDS)
+            )
+        except asyncio.TimeoutError:
+            pass
+        await db.refresh(job)
+
+
 @router.get("/{job_id}/status", response_model=JobStatusResponse)
 async def get_job_status(
     job_id: str,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
+    user_service: AsyncUserService = Depends(get_user_service),
+    wait: float = Query(
+        default=0,
+        ge=0,
+        le=MAX_STATUS_WAIT_SECONDS,
+        description="Seconds to hold the request open until the job finishes",
+    ),
 ):
-    job = get_job_with_messages(db, job_id)
+    with job_completions.watch(job_id) as completed:
+        job = await get_job_with_messages(db, job_id)
 
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
-        )
-    user_service = UserService(db)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+            )
 
-    # ENSURE USER
-    user = user_service.ensure_user(claims)
-    # Verify job belongs to the authenticated user
-    if job.user_id != user.id:  # Adjust based on your JWT structure
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
-        )
+        # ENSURE USER
+        user_id = await user_service.ensure_user_id(claims)
+        # Verify job belongs to the authenticated user
+        if job.user_id != user_id:  # Adjust based on your JWT structure
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+
+        await wait_for_job(db, job, completed, wait)
 
     # Get agent message if job is completed
     agent_message = None
     if job.status == JobStatus.COMPLETED and job.agent_message_id:
-        agent_msg = db.query(Message).filter(Message.id == job.agent_message_id).first()
+        agent_msg = await db.scalar(
+            select(Message).where(Message.id == job.agent_message_id)
+        )
         if agent_msg:
             agent_message = _to_message_out(agent_msg)
 
@@ -61,7 +116,133 @@ async def get_job_status(
         job_id=job.id,
         status=job.status,
         agent_message=agent_message,
+        queue_wait_seconds=job.queue_wait_seconds,
         processing_time_seconds=job.processing_time_seconds,
+        tokens_used=job.tokens_used,
+        prompt_tokens=job.prompt_tokens,
+        completion_tokens=job.completion_tokens,
+        llm_latency_seconds=job.llm_latency_seconds,
+        prompt_size_tokens=job.prompt_size_tokens,
         error_message=job.error_message,
         updated_at=job.updated_at.isoformat() if job.updated_at else "",
     )
+
+
+@router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    claims: dict = Depends(verify_jwt),
+    user_service: AsyncUserService = Depends(get_user_service),
+    async_service: AsyncProcessingService = Depends(get_async_processing_service),
+):
+    """Cancel a pending or generating job, stopping its model call."""
+    job = await get_job_with_messages(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+
+    user_id = await user_service.ensure_user_id(claims)
+    if job.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+
+    if not await async_service.cancel_job(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job already finished"
+        )
+    await db.commit()
+
+    announce_cancelled(job_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _terminal_events(db: AsyncSession, job) -> list[str]:
+    if job is None:
+        return [_sse("error", {"detail": "Job not found"})]
+
+    if job.status == JobStatus.COMPLETED and job.agent_message_id:
+        agent_msg = await db.scalar(
+            select(Message).where(Message.id == job.agent_message_id)
+        )
+        if agent_msg:
+            return [
+                _sse("message", {"message": _to_message_out(agent_msg).model_dump()})
+            ]
+
+    return [_sse("error", {"detail": job.error_message or "Job failed"})]
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    claims: dict = Depends(verify_jwt),
+    user_service: AsyncUserService = Depends(get_user_service),
+):
+    """Stream job progress as Server-Sent Events until the agent message is saved."""
+    # Subscribe before reading the status so no event between the two is lost
+    queue = job_events.subscribe(job_id)
+
+    job = await get_job_with_messages(db, job_id)
+    if not job:
+        job_events.unsubscribe(job_id, queue)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+
+    user_id = await user_service.ensure_user_id(claims)
+    if job.user_id != user_id:
+        job_events.unsubscribe(job_id, queue)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+
+    finished = None
+    if job.status not in ACTIVE_STATUSES:
+        job_events.unsubscribe(job_id, queue)
+        finished = await _terminal_events(db, job)
+
+    async def event_stream() -> AsyncIterator[str]:
+        if finished is not None:
+            for chunk in finished:
+                yield chunk
+            return
+
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # The request's own session is closed once streaming starts
+                    async with AsyncSessionLocal() as poll_db:
+                        current = await get_job_with_messages(poll_db, job_id)
+                        if current is None or current.status not in ACTIVE_STATUSES:
+                            for chunk in await _terminal_events(poll_db, current):
+                                yield chunk
+                            return
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is None:
+                    return
+
+                yield _sse(
+                    event["event"],
+                    {k: v for k, v in event.items() if k != "event"},
+                )
+        finally:
+            job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,17 +1,43 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, status, BackgroundTasks, HTTPException, Query
-from sqlalchemy.orm import Session as OrmSession
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    status,
+    HTTPException,
+    Query,
+    Response,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.endpoints.jobs import MAX_STATUS_WAIT_SECONDS, _sse, wait_for_job
 from app.core.auth import verify_jwt
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_async_db
 from app.dependencies import (
     get_session_service,
     get_message_service,
     get_async_processing_service,
     get_seo_agent_service,
+    get_user_service,
 )
-from app.schemas.message import MessageCreateRequest, MessageOut, AsyncMessageResponse
+from app.enums import JobStatus
+from app.models.job import Job
+from app.models.message import Message
+from app.repositories.message import AsyncMessageRepository
+from app.repositories.usage import GENERATE, REGENERATE, AsyncUsageRepository
+from app.schemas.message import (
+    MessageCreateRequest,
+    MessageOut,
+    AsyncMessageResponse,
+    RegenerateRequest,
+)
+from app.schemas.pagination import Page
 from app.schemas.session import (
     SessionCreateRequest,
     SessionStartResponse,
@@ -21,14 +47,112 @@ from app.schemas.session import (
     SessionUpdateResponse,
 )
 from app.services.agent.async_processing_service import AsyncProcessingService
-from app.services.domain.job_service import process_agent_job
-from app.services.domain.message_service import MessageService
-from app.services.domain.session_service import SessionService
-from app.services.domain.user_service import UserService
+from app.services.agent.job_events import job_completions
+from app.services.agent.job_queue import get_job_queue
+from app.services.agent.llm_retry import LLMUnavailableError
+from app.services.agent.usage import LLMUsage, track_usage
+from app.services.domain.message_service import (
+    AsyncMessageService,
+    MessageTransformer,
+)
+from app.services.domain.session_service import AsyncSessionService
+from app.services.domain.user_service import AsyncUserService
 from app.services.seo_agent_service import SEOAgentService
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+REGENERATABLE_FIELDS = (
+    "title_tag",
+    "meta_description",
+    "meta_keywords",
+    "page_title",
+    "page_content",
+)
+
+
+def _max_wait_query():
+    return Query(
+        default=None,
+        ge=0,
+        le=MAX_STATUS_WAIT_SECONDS * 1000,
+        description=(
+            "Generate through the job queue and wait at most this long; if it "
+            "is not done by then, respond 202 with the job id to poll"
+        ),
+    )
+
+
+def _idempotency_key_header():
+    return Header(
+        default=None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description=(
+            "Retries with the same key return the original response instead "
+            "of queueing another generation"
+        ),
+    )
+
+
+async def _replayed_user_message(
+    job: Job,
+    message: str,
+    message_service: AsyncMessageService,
+    response: Response,
+) -> Message:
+    """
+    Load the user message of the job an Idempotency-Key already created and
+    mark the response as a replay; 422 if the key was used for a different
+    request.
+    """
+    user_message = await message_service.get_message(
+        job.session_id, job.user_message_id
+    )
+    if user_message is None or user_message.message_content != message:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+
+    response.status_code = status.HTTP_200_OK
+    response.headers["Idempotent-Replayed"] = "true"
+    return user_message
+
+
+async def _run_job_until(
+    db: AsyncSession,
+    job: Job,
+    max_wait_ms: int,
+    message_service: AsyncMessageService,
+) -> Optional[MessageOut]:
+    """
+    Commit and start `job`, then wait for it up to max_wait_ms. Returns the
+    agent message, or None if the job is still running and the caller should
+    hand the client the job id instead.
+    """
+    with job_completions.watch(job.id) as completed:
+        await db.commit()
+        get_job_queue().notify()
+        await wait_for_job(db, job, completed, max_wait_ms / 1000)
+
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=job.error_message or "Generation failed, please retry",
+        )
+    if job.status == JobStatus.CANCELLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=job.error_message or "Job cancelled",
+        )
+    if job.status != JobStatus.COMPLETED:
+        return None
+
+    agent_message = await message_service.get_message(
+        job.session_id, job.agent_message_id
+    )
+    return message_service._transformer.to_message_out(agent_message)
+
 
 @router.post(
     "/async",
@@ -37,65 +161,173 @@ router = APIRouter(prefix="/sessions", tags=["sessions"])
 )
 async def create_session_async(
     payload: SessionCreateRequest,
-    background_tasks: BackgroundTasks,
-    db: OrmSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
-    message_service: MessageService = Depends(get_message_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
     async_service: AsyncProcessingService = Depends(get_async_processing_service),
+    idempotency_key: Optional[str] = _idempotency_key_header(),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
-
-    session = session_service.create_session(user.id, payload.title, payload.message)
-    user_message = message_service.create_user_message(session.id, payload.message)
-
-    job = async_service.create_processing_job(user.id, session.id, user_message)
-
-    db.commit()
-
-    background_tasks.add_task(process_agent_job, job.id)
+    user_id = await user_service.ensure_user_id(claims)
+
+    async def replay(job: Job) -> AsyncSessionStartResponse:
+        session = await session_service.get_session(job.session_id, user_id)
+        if session is None or session.anchor_message_id != job.user_message_id:
+            # The key belongs to a follow-up message, not a new session
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        user_message = await _replayed_user_message(
+            job, payload.message, message_service, response
+        )
+        return async_service.build_session_start_response(
+            session.id, session.title, job, user_message
+        )
+
+    if idempotency_key and (
+        job := await async_service.find_idempotent_job(user_id, idempotency_key)
+    ):
+        return await replay(job)
+
+    session = await session_service.create_session(
+        user_id, payload.title, payload.message
+    )
+    user_message = await message_service.create_user_message(
+        session.id, payload.message
+    )
 
-    db.refresh(user_message)
-    db.refresh(session)
+    try:
+        job = await async_service.create_processing_job(
+            user_id,
+            session.id,
+            user_message,
+            payload.bypass_cache,
+            idempotency_key,
+            bulk=payload.bulk,
+        )
+        await db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key got there first
+        await db.rollback()
+        job = idempotency_key and await async_service.find_idempotent_job(
+            user_id, idempotency_key
+        )
+        if not job:
+            raise
+        return await replay(job)
+
+    get_job_queue().notify()
+
+    await db.refresh(user_message)
+    await db.refresh(session)
 
     return async_service.build_session_start_response(
         session.id, session.title, job, user_message
     )
 
 
+async def _record_usage(
+    user_id: str, session_id: str, kind: str, usage: LLMUsage
+) -> None:
+    """
+    Store the model usage of a call made outside a job. Its own session, so
+    it is kept whether or not the result is saved.
+    """
+    if not usage.calls:
+        return  # answered from the cache
+
+    async with AsyncSessionLocal() as usage_db:
+        await AsyncUsageRepository(usage_db).add_record(
+            user_id, kind, usage, session_id
+        )
+        await usage_db.commit()
+
+
 @router.post(
-    "", response_model=SessionStartResponse, status_code=status.HTTP_201_CREATED
+    "",
+    response_model=SessionStartResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": AsyncSessionStartResponse,
+            "description": "Not done within max_wait_ms; poll the job",
+        }
+    },
 )
 async def create_session(
     payload: SessionCreateRequest,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
-    message_service: MessageService = Depends(get_message_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
     ai_service: SEOAgentService = Depends(get_seo_agent_service),
+    async_service: AsyncProcessingService = Depends(get_async_processing_service),
+    max_wait_ms: Optional[int] = _max_wait_query(),
 ):
     """Create a session with synchronous agent processing."""
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
-    session = session_service.create_session(user.id, payload.title, payload.message)
-    user_message = message_service.create_user_message(session.id, payload.message)
-    db.flush()
-
-    suggestions = await ai_service.process_first_message_new_session(
-        session.title, payload.message
+    user_id = await user_service.ensure_user_id(claims)
+    session = await session_service.create_session(
+        user_id, payload.title, payload.message
+    )
+    user_message = await message_service.create_user_message(
+        session.id, payload.message
     )
 
-    agent_message = message_service.create_agent_message(session.id, suggestions)
-
-    db.commit()
-
-    db.refresh(user_message)
-    db.refresh(session)
+    if max_wait_ms is not None:
+        job = await async_service.create_processing_job(
+            user_id, session.id, user_message, payload.bypass_cache, bulk=payload.bulk
+        )
+        agent_message = await _run_job_until(db, job, max_wait_ms, message_service)
+        if agent_message is None:
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=jsonable_encoder(
+                    async_service.build_session_start_response(
+                        session.id, session.title, job, user_message
+                    )
+                ),
+            )
+
+        return SessionStartResponse(
+            session_id=session.id,
+            user_id=user_id,
+            session_title=session.title,
+            user_message=message_service._transformer.to_message_out(user_message),
+            agent_message=agent_message,
+        )
+
+    # Commit before generating: an open SQLite write transaction would
+    # block every other writer for the whole model call
+    await db.commit()
+
+    try:
+        with track_usage() as usage:
+            try:
+                suggestions = await ai_service.process_first_message_new_session(
+                    session.title, payload.message, bypass_cache=payload.bypass_cache
+                )
+            finally:
+                await _record_usage(user_id, session.id, GENERATE, usage)
+    except Exception as e:
+        await session_service.delete_session(session.id, user_id)
+        if isinstance(e, LLMUnavailableError):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The model is temporarily unavailable, please retry",
+            )
+        raise
+
+    agent_message = await message_service.create_agent_message(session.id, suggestions)
+
+    await db.commit()
 
     return SessionStartResponse(
         session_id=session.id,
-        user_id=user.id,
+        user_id=user_id,
         session_title=session.title,
         user_message=message_service._transformer.to_message_out(user_message),
         agent_message=agent_message,
@@ -110,29 +342,65 @@ async def create_session(
 async def add_message_to_session_async(
     session_id: str,
     payload: MessageCreateRequest,
-    background_tasks: BackgroundTasks,
-    db: OrmSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
-    message_service: MessageService = Depends(get_message_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
     async_service: AsyncProcessingService = Depends(get_async_processing_service),
+    idempotency_key: Optional[str] = _idempotency_key_header(),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
-
-    session = session_service.get_session(session_id, user.id)
+    user_id = await user_service.ensure_user_id(claims)
+
+    async def replay(job: Job) -> AsyncMessageResponse:
+        if job.session_id != session_id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        user_message = await _replayed_user_message(
+            job, payload.message, message_service, response
+        )
+        return async_service.build_message_response(session_id, job, user_message)
+
+    if idempotency_key and (
+        job := await async_service.find_idempotent_job(user_id, idempotency_key)
+    ):
+        return await replay(job)
+
+    session = await session_service.get_session(session_id, user_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    user_message = message_service.create_user_message(session_id, payload.message)
-
-    job = async_service.create_processing_job(user.id, session_id, user_message)
-
-    db.commit()
-
-    background_tasks.add_task(process_agent_job, job.id)
+    user_message = await message_service.create_user_message(
+        session_id, payload.message
+    )
 
-    db.refresh(user_message)
+    try:
+        job = await async_service.create_processing_job(
+            user_id,
+            session_id,
+            user_message,
+            payload.bypass_cache,
+            idempotency_key,
+            followup=True,
+            bulk=payload.bulk,
+        )
+        await db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key got there first
+        await db.rollback()
+        job = idempotency_key and await async_service.find_idempotent_job(
+            user_id, idempotency_key
+        )
+        if not job:
+            raise
+        return await replay(job)
+
+    get_job_queue().notify()
+
+    await db.refresh(user_message)
 
     return async_service.build_message_response(session_id, job, user_message)
 
@@ -141,62 +409,242 @@ async def add_message_to_session_async(
     "/{session_id}/messages",
     response_model=MessageOut,
     status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": AsyncMessageResponse,
+            "description": "Not done within max_wait_ms; poll the job",
+        }
+    },
 )
 async def add_message_to_session(
     session_id: str,
     payload: MessageCreateRequest,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
-    message_service: MessageService = Depends(get_message_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
     ai_service: SEOAgentService = Depends(get_seo_agent_service),
+    async_service: AsyncProcessingService = Depends(get_async_processing_service),
+    max_wait_ms: Optional[int] = _max_wait_query(),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
+    user_id = await user_service.ensure_user_id(claims)
 
-    session = session_service.get_session(session_id, user.id)
+    session = await session_service.get_session(session_id, user_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    user_message = message_service.create_user_message(session_id, payload.message)
-    db.flush()
-
-    suggestions = await ai_service.process_message_to_existing_session(
-        session_id, session.title, user_message.message_content
+    if max_wait_ms is not None:
+        user_message = await message_service.create_user_message(
+            session_id, payload.message
+        )
+        job = await async_service.create_processing_job(
+            user_id,
+            session_id,
+            user_message,
+            payload.bypass_cache,
+            followup=True,
+            bulk=payload.bulk,
+        )
+        agent_message = await _run_job_until(db, job, max_wait_ms, message_service)
+        if agent_message is None:
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=jsonable_encoder(
+                    async_service.build_message_response(session_id, job, user_message)
+                ),
+            )
+
+        return agent_message
+
+    context = await ai_service.load_followup_context(
+        session_id, session.title, payload.message, payload.bypass_cache
+    )
+    user_message = await message_service.create_user_message(
+        session_id, payload.message
     )
+    # Commit before generating: an open SQLite write transaction would
+    # block every other writer for the whole model call
+    await db.commit()
+
+    try:
+        with track_usage() as usage:
+            try:
+                suggestions = await ai_service.run(context)
+            finally:
+                await _record_usage(user_id, session_id, GENERATE, usage)
+    except Exception as e:
+        await message_service.delete_message(user_message)
+        await db.commit()
+        if isinstance(e, LLMUnavailableError):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The model is temporarily unavailable, please retry",
+            )
+        raise
+
+    agent_message = await message_service.create_agent_message(session_id, suggestions)
+
+    await db.commit()
+
+    return agent_message
 
-    agent_message = message_service.create_agent_message(session_id, suggestions)
 
-    db.commit()
+@router.post(
+    "/{session_id}/messages/{message_id}/regenerate",
+    response_model=MessageOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def regenerate_message_fields(
+    session_id: str,
+    message_id: str,
+    payload: Optional[RegenerateRequest] = Body(default=None),
+    fields: str = Query(
+        ..., description="Comma-separated fields to regenerate, e.g. title_tag"
+    ),
+    stream: bool = Query(
+        default=False, description="Stream partial fields as Server-Sent Events"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    claims: dict = Depends(verify_jwt),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
+    ai_service: SEOAgentService = Depends(get_seo_agent_service),
+):
+    """
+    Regenerate selected fields of an agent message and save the result as a
+    new agent message; fields that were not requested are copied unchanged.
+    """
+    payload = payload or RegenerateRequest()
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in REGENERATABLE_FIELDS]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"fields must be a subset of: {', '.join(REGENERATABLE_FIELDS)}",
+        )
+
+    user_id = await user_service.ensure_user_id(claims)
+
+    session = await session_service.get_session(session_id, user_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-    return agent_message
+    source = await message_service.get_message(session_id, message_id)
+    if not source or source.role != "agent":
+        raise HTTPException(status_code=404, detail="Agent message not found")
+
+    first_message = await message_service.get_first_message(session_id)
+    draft = message_service.extract_suggestions(source)
+
+    # Everything the model call needs is loaded up front, so it can also run
+    # after the request's own session is closed (streaming)
+    async def regenerate(on_event=None) -> dict:
+        with track_usage() as usage:
+            try:
+                return await ai_service.regenerate_fields(
+                    session.title,
+                    draft,
+                    requested,
+                    instructions=payload.instructions,
+                    anchor=first_message.message_content if first_message else None,
+                    on_event=on_event,
+                    bypass_cache=payload.bypass_cache,
+                )
+            finally:
+                await _record_usage(user_id, session_id, REGENERATE, usage)
+
+    if not stream:
+        try:
+            suggestions = await regenerate()
+        except LLMUnavailableError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The model is temporarily unavailable, please retry",
+            )
+
+        agent_message = await message_service.create_agent_message(
+            session_id, suggestions
+        )
+        await db.commit()
+
+        return agent_message
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run() -> None:
+        try:
+            suggestions = await regenerate(on_event=events.put_nowait)
+            async with AsyncSessionLocal() as write_db:
+                writer = AsyncMessageService(
+                    AsyncMessageRepository(write_db), MessageTransformer()
+                )
+                agent_message = await writer.create_agent_message(
+                    session_id, suggestions
+                )
+                await write_db.commit()
+            events.put_nowait(
+                {"event": "message", "message": agent_message.model_dump()}
+            )
+        except Exception as e:
+            detail = (
+                "The model is temporarily unavailable, please retry"
+                if isinstance(e, LLMUnavailableError)
+                else "Regeneration failed"
+            )
+            events.put_nowait({"event": "error", "detail": detail})
+        finally:
+            events.put_nowait(None)
+
+    async def event_stream() -> AsyncIterator[str]:
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield _sse(
+                    event["event"],
+                    {k: v for k, v in event.items() if k != "event"},
+                )
+        finally:
+            task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@router.get("", response_model=List[SessionListResponse])
+@router.get("", response_model=Page[SessionListResponse])
 async def get_user_sessions(
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    limit: int = Query(default=50, le=100, description="Max sessions to return"),
-    offset: int = Query(default=0, ge=0, description="Number of sessions to skip"),
-    session_service: SessionService = Depends(get_session_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    limit: int = Query(default=50, ge=1, le=100, description="Max sessions to return"),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor from the previous page"
+    ),
+    session_service: AsyncSessionService = Depends(get_session_service),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
+    user_id = await user_service.ensure_user_id(claims)
 
-    return session_service.get_user_sessions(user.id, limit, offset)
+    try:
+        return await session_service.get_user_sessions(user_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: str,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
+    user_id = await user_service.ensure_user_id(claims)
 
-    success = session_service.delete_session(session_id, user.id)
+    success = await session_service.delete_session(session_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -205,35 +653,47 @@ async def delete_session(
 async def update_session(
     session_id: str,
     payload: SessionUpdateRequest,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    session_service: SessionService = Depends(get_session_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    session_service: AsyncSessionService = Depends(get_session_service),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
+    user_id = await user_service.ensure_user_id(claims)
 
-    result = session_service.update_session(session_id, user.id, payload)
+    result = await session_service.update_session(session_id, user_id, payload)
     if not result:
         raise HTTPException(status_code=404, detail="Session not found")
 
     return result
 
 
-@router.get("/{session_id}/messages", response_model=List[MessageOut])
+@router.get("/{session_id}/messages", response_model=Page[MessageOut])
 async def get_session_messages(
     session_id: str,
-    db: OrmSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: dict = Depends(verify_jwt),
-    limit: int = Query(default=100, le=500, description="Max messages to return"),
-    offset: int = Query(default=0, ge=0, description="Number of messages to skip"),
-    session_service: SessionService = Depends(get_session_service),
-    message_service: MessageService = Depends(get_message_service),
+    user_service: AsyncUserService = Depends(get_user_service),
+    limit: int = Query(default=100, ge=1, le=500, description="Max messages to return"),
+    after: Optional[str] = Query(
+        default=None, description="Return messages after this cursor (newer)"
+    ),
+    before: Optional[str] = Query(
+        default=None,
+        description="Return messages before this cursor (older); "
+        "without either cursor the latest messages are returned",
+    ),
+    session_service: AsyncSessionService = Depends(get_session_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
 ):
-    user_service = UserService(db)
-    user = user_service.ensure_user(claims)
+    user_id = await user_service.ensure_user_id(claims)
 
-    session = session_service.get_session(session_id, user.id)
+    session = await session_service.get_session(session_id, user_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    return message_service.get_session_messages(session_id, limit, offset)
+    try:
+        return await message_service.get_session_messages(
+            session_id, limit, after, before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
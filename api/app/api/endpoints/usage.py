@@ -0,0 +1,56 @@
+from datetime import timedelta
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.auth import require_scope, verify_jwt
+from app.dependencies import get_usage_repository, get_user_service
+from app.models.timestamp_mixin import sofia_now
+from app.repositories.usage import AsyncUsageRepository
+from app.schemas.usage import UsageDay
+from app.services.domain.user_service import AsyncUserService
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+def _to_usage_days(rows) -> List[UsageDay]:
+    return [
+        UsageDay(
+            day=str(row.day),
+            user_id=row.user_id,
+            jobs=row.jobs,
+            sync_generations=row.sync_generations,
+            regenerations=row.regenerations,
+            prompt_tokens=row.prompt_tokens,
+            completion_tokens=row.completion_tokens,
+            tokens_used=row.tokens_used,
+            llm_latency_seconds=row.llm_latency_seconds,
+        )
+        for row in rows
+    ]
+
+
+@router.get("", response_model=List[UsageDay])
+async def get_my_usage(
+    claims: dict = Depends(verify_jwt),
+    user_service: AsyncUserService = Depends(get_user_service),
+    usage_repo: AsyncUsageRepository = Depends(get_usage_repository),
+    days: int = Query(default=30, ge=1, le=365, description="Days to look back"),
+):
+    """Token usage of the current user's model calls, per day."""
+    user_id = await user_service.ensure_user_id(claims)
+    since = sofia_now() - timedelta(days=days)
+
+    return _to_usage_days(await usage_repo.usage_by_day(since, user_id))
+
+
+@router.get("/users", response_model=List[UsageDay])
+async def get_usage_by_user(
+    claims: dict = Depends(require_scope("read:usage")),
+    usage_repo: AsyncUsageRepository = Depends(get_usage_repository),
+    days: int = Query(default=30, ge=1, le=365, description="Days to look back"),
+):
+    """Token usage of all users' model calls, per user and day."""
+    since = sofia_now() - timedelta(days=days)
+
+    return _to_usage_days(await usage_repo.usage_by_day(since))
@@ -1,5 +1,7 @@
 import asyncio
+import hashlib
 import time
+from collections import OrderedDict
 from functools import lru_cache
 from typing import Dict, Any
 
@@ -8,6 +10,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError
 from jose.utils import base64url_decode
 
 from app.core.settings import get_settings
@@ -19,25 +22,116 @@ def _normalize_issuer(iss: str) -> str:
     return iss if iss.endswith("/") else iss + "/"
 
 
+def _consume_exception(task: asyncio.Task) -> None:
+    # Background refresh failures are retried later; avoid "never retrieved" noise
+    if not task.cancelled():
+        task.exception()
+
+
 class JWKSCache:
-    def __init__(self, url: str, ttl_seconds: int = 600):
+    """
+    JWKS keys with stale-while-revalidate refresh.
+
+    Once keys are loaded, get() never waits on the network: when the TTL is
+    close to expiring a single background refresh is started and the current
+    keys keep being served. Failed refreshes back off exponentially while the
+    stale keys stay in use. Only the very first load (or an explicit
+    force_refresh) waits for the fetch, and concurrent callers share it.
+    Forced refreshes run at most once per min_refresh_interval.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int = 600,
+        refresh_ahead_seconds: int = 60,
+        max_backoff_seconds: int = 300,
+        min_refresh_interval_seconds: int = 30,
+    ):
         self.url = url
         self.ttl = ttl_seconds
+        self.refresh_ahead = refresh_ahead_seconds
+        self.max_backoff = max_backoff_seconds
+        self.min_refresh_interval = min_refresh_interval_seconds
         self._keys: list[dict] | None = None
+        self._by_kid: dict[str, dict] = {}
         self._exp: float = 0.0
-        self._lock = asyncio.Lock()
+        self._fetched_at: float = 0.0
+        self._client: httpx.AsyncClient | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._failures = 0
+        self._retry_at: float = 0.0
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=5.0,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            )
+        return self._client
+
+    async def _fetch(self) -> None:
+        try:
+            r = await self._http().get(self.url)
+            r.raise_for_status()
+            keys = r.json()["keys"]
+        except Exception:
+            self._failures += 1
+            backoff = min(2**self._failures, self.max_backoff)
+            self._retry_at = time.time() + backoff
+            raise
+
+        self._keys = keys
+        self._by_kid = {k.get("kid"): k for k in keys}
+        self._fetched_at = time.time()
+        self._exp = self._fetched_at + self.ttl
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+            self._refresh_task.add_done_callback(_consume_exception)
+        return self._refresh_task
+
+    def next_refresh_at(self) -> float:
+        return max(self._fetched_at + self.min_refresh_interval, self._retry_at)
+
+    def _refresh_allowed(self) -> bool:
+        return time.time() >= self.next_refresh_at()
 
     async def get(self, force_refresh: bool = False) -> list[dict]:
-        async with self._lock:
-            now = time.time()
-            if force_refresh or self._keys is None or now >= self._exp:
-                async with httpx.AsyncClient(timeout=5.0) as c:
-                    r = await c.get(self.url)
-                    r.raise_for_status()
-                    self._keys = r.json()["keys"]
-                    self._exp = now + self.ttl
+        if force_refresh and self._keys is not None and not self._refresh_allowed():
+            # Forced refreshes are rate limited; join one already in flight
+            if self._refresh_task and not self._refresh_task.done():
+                await asyncio.shield(self._refresh_task)
+            return self._keys
+
+        if force_refresh or self._keys is None:
+            await asyncio.shield(self._start_refresh())
             return self._keys
 
+        now = time.time()
+        if now >= self._exp - self.refresh_ahead and now >= self._retry_at:
+            self._start_refresh()
+        return self._keys
+
+    async def prefetch(self) -> None:
+        await self.get()
+
+    async def close(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_key(
+        self, kid: str | None, force_refresh: bool = False
+    ) -> dict | None:
+        await self.get(force_refresh=force_refresh)
+        return self._by_kid.get(kid)
+
 
 def _jwk_to_public_key(jwk: Dict[str, Any]):
     e = int.from_bytes(base64url_decode(jwk["e"].encode()), "big")
@@ -45,52 +139,148 @@ def _jwk_to_public_key(jwk: Dict[str, Any]):
     return rsa.RSAPublicNumbers(e, n).public_key()
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token digest -> verified claims. Entries are only served
+    until the token's own exp (plus leeway), so a cached token never outlives
+    what jwt.decode would have accepted.
+    """
+
+    def __init__(self, maxsize: int = 1024, leeway: int = 0):
+        self.maxsize = maxsize
+        self.leeway = leeway
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+
+        claims, exp = entry
+        if time.time() > exp + self.leeway:
+            del self._entries[digest]
+            return None
+
+        self._entries.move_to_end(digest)
+        return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+
+        digest = self._digest(token)
+        self._entries[digest] = (dict(claims), float(exp))
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
 class JWTVerifier:
+    LEEWAY_SECONDS = 30
+    UNKNOWN_KID_MAXSIZE = 256
+
     def __init__(self, issuer: str, audience: str):
         self.issuer = _normalize_issuer(issuer)
         self.audience = audience
         self.jwks = JWKSCache(f"{self.issuer}.well-known/jwks.json")
+        self._public_keys: dict[str, tuple[dict, Any]] = {}
+        self._verified = VerifiedTokenCache(leeway=self.LEEWAY_SECONDS)
+        # kid -> time until which it is known to be missing from the JWKS.
+        # Entries last until the next refresh is allowed, so a freshly
+        # rotated kid gets exactly one forced download per interval.
+        self._unknown_kids: OrderedDict[str | None, float] = OrderedDict()
 
-    async def _select_key(self, token: str, refresh=False):
-        unverified = jwt.get_unverified_header(token)
-        kid = unverified.get("kid")
-        keys = await self.jwks.get(force_refresh=refresh)
-        return next((k for k in keys if k.get("kid") == kid), None)
+    def _is_known_unknown(self, kid: str | None) -> bool:
+        until = self._unknown_kids.get(kid)
+        if until is None:
+            return False
+        if time.time() >= until:
+            del self._unknown_kids[kid]
+            return False
+        return True
 
-    async def verify_token(self, token: str) -> dict:
-        key_jwk = await self._select_key(token)
+    def _remember_unknown(self, kid: str | None) -> None:
+        self._unknown_kids[kid] = self.jwks.next_refresh_at()
+        self._unknown_kids.move_to_end(kid)
+        while len(self._unknown_kids) > self.UNKNOWN_KID_MAXSIZE:
+            self._unknown_kids.popitem(last=False)
+
+    async def _select_key(self, kid: str | None) -> dict | None:
+        key_jwk = await self.jwks.get_key(kid)
+        if key_jwk or self._is_known_unknown(kid):
+            return key_jwk
+
+        # Only a kid not seen before may force a (rate limited) JWKS download
+        key_jwk = await self.jwks.get_key(kid, force_refresh=True)
         if not key_jwk:
-            key_jwk = await self._select_key(token, refresh=True)
-            if not key_jwk:
-                raise HTTPException(status_code=401, detail="Unknown key id (kid)")
-        public_key = _jwk_to_public_key(key_jwk)
+            self._remember_unknown(kid)
+        return key_jwk
+
+    def _public_key(self, jwk: Dict[str, Any]):
+        kid = jwk.get("kid")
+        cached = self._public_keys.get(kid)
+        # Compare the JWK itself so a rotated key under a reused kid is re-parsed
+        if cached and cached[0] == jwk:
+            return cached[1]
+
+        public_key = _jwk_to_public_key(jwk)
+        self._public_keys[kid] = (jwk, public_key)
+        return public_key
+
+    def _decode(self, token: str, jwk: Dict[str, Any]) -> dict:
         opts = {
             "verify_at_hash": False,
-            "leeway": 30,
+            "leeway": self.LEEWAY_SECONDS,
         }  # python-jose: leeway goes inside options
         try:
             return jwt.decode(
                 token,
-                key=public_key,
+                key=self._public_key(jwk),
                 algorithms=["RS256"],
                 audience=self.audience,
                 issuer=self.issuer,
                 options=opts,
             )
+        # Claim failures are final; a key refresh cannot fix them
+        except ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except JWTClaimsError:
+            raise HTTPException(status_code=401, detail="Invalid token claims")
+
+    async def verify_token(self, token: str) -> dict:
+        claims = self._verified.get(token)
+        if claims is not None:
+            return claims
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        key_jwk = await self._select_key(kid)
+        if not key_jwk:
+            raise HTTPException(status_code=401, detail="Unknown key id (kid)")
+
+        try:
+            claims = self._decode(token, key_jwk)
         except jwt.JWTError:
-            # retry once in case of rotation
-            key_jwk = await self._select_key(token, refresh=True)
-            if not key_jwk:
+            # Signature failure: retry once in case the key under this kid rotated
+            refreshed = await self.jwks.get_key(kid, force_refresh=True)
+            if not refreshed or refreshed == key_jwk:
                 raise HTTPException(status_code=401, detail="Invalid token")
-            public_key = _jwk_to_public_key(key_jwk)
-            return jwt.decode(
-                token,
-                key=public_key,
-                algorithms=["RS256"],
-                audience=self.audience,
-                issuer=self.issuer,
-                options=opts,
-            )
+            try:
+                claims = self._decode(token, refreshed)
+            except jwt.JWTError:
+                raise HTTPException(status_code=401, detail="Invalid token")
+
+        self._verified.put(token, claims)
+        return claims
 
 
 @lru_cache(maxsize=1)
@@ -1,15 +1,100 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.settings import get_database_settings
 
 DATABASE_URL = "sqlite:///./seo_agent.sqlite3"
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./seo_agent.sqlite3"
+
+db_settings = get_database_settings()
+PRODUCTION_PROFILE = db_settings.database_profile == "production"
+
+
+def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={db_settings.sqlite_busy_timeout_ms}")
+    if PRODUCTION_PROFILE:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA mmap_size={db_settings.sqlite_mmap_size}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{db_settings.sqlite_cache_size_kib}")
+    cursor.close()
+
+
+def _apply_read_only(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
 
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},
     future=True,
 )
+event.listen(engine, "connect", _apply_pragmas)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Async engine used by the API and job workers; the sync one above stays
+# available for scripts and schema management
+if PRODUCTION_PROFILE:
+    # One connection serialises all writers in-process instead of letting
+    # them collide on SQLite's file lock ("database is locked")
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        future=True,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=db_settings.sqlite_writer_timeout_seconds,
+    )
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        future=True,
+        pool_size=db_settings.sqlite_read_pool_size,
+        max_overflow=0,
+    )
+    event.listen(async_read_engine.sync_engine, "connect", _apply_pragmas)
+    event.listen(async_read_engine.sync_engine, "connect", _apply_read_only)
+else:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, future=True)
+    async_read_engine = None
+event.listen(async_engine.sync_engine, "connect", _apply_pragmas)
+
+
+class RoutingSession(Session):
+    """
+    Sends flushes and DML to the writer engine and plain reads to the
+    read pool. Once a transaction has written, its reads stay on the writer
+    so they see their own uncommitted changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase) or self.info.get("wrote"):
+            self.info["wrote"] = True
+            return async_engine.sync_engine
+        return async_read_engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_write_routing(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+
+
+if PRODUCTION_PROFILE:
+    AsyncSessionLocal = async_sessionmaker(
+        sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 class Base(DeclarativeBase):
     pass
@@ -21,3 +106,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+
+
+def init_db() -> None:
+    """
+    Create missing tables, then add columns and indexes introduced after a
+    table was first created (create_all never alters existing tables).
+    Callers must import app.models first so every table is registered.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    # Denormalized columns say how to fill in existing rows
+                    if "backfill" in column.info:
+                        conn.execute(text(column.info["backfill"]))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -9,12 +9,96 @@ class Settings(BaseSettings):
     openai_model: str
     openai_base_url: str
 
-    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+    auth_jwks_prefetch: bool = True
+
+    # Job queue: "inprocess" runs workers inside the API process,
+    # "external" expects `python -m app.worker` to run separately
+    job_worker_mode: str = "inprocess"
+    job_worker_concurrency: int = 4
+    job_lease_seconds: int = 120
+    job_poll_interval_seconds: float = 1.0
+    job_max_attempts: int = 3
+    # Jobs one user may have running at once, across all workers
+    job_user_max_concurrency: int = 2
+    # A user with this many jobs waiting has all of them scheduled as bulk
+    job_bulk_threshold: int = 5
+    # Fair queuing: a user's share is measured over jobs started in the last
+    # window, and a waiting job gains one job's worth of priority per
+    # aging interval so no class starves
+    job_fair_window_seconds: int = 60
+    job_aging_seconds: int = 60
+    # A job still unfinished this long after a worker first claimed it is
+    # failed and its model call cancelled; time spent queued does not count
+    job_deadline_seconds: int = 300
+    # How long an Idempotency-Key on the async endpoints replays its job
+    idempotency_window_seconds: int = 24 * 3600
+
+    # LLM response cache: in-memory LRU in front of a SQLite file
+    # (an empty path keeps the cache memory-only)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./llm_cache.sqlite3"
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_memory_entries: int = 256
+    llm_cache_disk_entries: int = 10_000
+
+    # OpenAI request scheduling; limits are corrected at runtime from the
+    # provider's rate-limit headers
+    openai_rpm_limit: int = 500
+    openai_tpm_limit: int = 200_000
+    openai_max_concurrency: int = 8
+    openai_completion_token_estimate: int = 1500
+
+    # Retries cover connection errors, timeouts, 429s and 5xx responses;
+    # hedging sends a duplicate request once one is slower than the recent p95
+    openai_request_timeout_seconds: float = 60.0
+    openai_max_retries: int = 3
+    openai_retry_base_seconds: float = 0.5
+    openai_retry_max_seconds: float = 8.0
+    openai_hedging_enabled: bool = False
+    openai_hedge_min_delay_seconds: float = 2.0
+
+    # Token budget for the user prompt; long briefs and drafts are condensed
+    prompt_token_budget: int = 3000
+
+    # Follow-ups ask the model for changed fields only and merge them onto
+    # the previous draft instead of regenerating the whole page
+    followup_patch_mode: bool = True
+
+    model_config = SettingsConfigDict(
+        env_file=".env", case_sensitive=False, extra="ignore"
+    )
 
     @property
     def issuer(self) -> str:
         return f"https://{self.auth0_domain}/"
 
 
+class DatabaseSettings(BaseSettings):
+    """
+    Database tuning, kept apart from Settings so scripts that only touch the
+    database do not need Auth0/OpenAI configuration.
+
+    "default" keeps SQLite's stock behaviour. "production" enables WAL with
+    synchronous=NORMAL, mmap and a larger page cache, enforces foreign keys,
+    routes every write through a single writer connection and serves reads
+    from a pool of query-only connections.
+    """
+
+    database_profile: str = "default"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_read_pool_size: int = 8
+    sqlite_writer_timeout_seconds: float = 30.0
+
+    model_config = SettingsConfigDict(
+        env_file=".env", case_sensitive=False, extra="ignore"
+    )
+
+
 def get_settings() -> Settings:
     return Settings()
+
+
+def get_database_settings() -> DatabaseSettings:
+    return DatabaseSettings()
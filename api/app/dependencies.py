@@ -1,37 +1,49 @@
 from functools import lru_cache
 
 from fastapi import Depends
-from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.repositories.job import JobRepository
-from app.repositories.message import MessageRepository
-from app.repositories.session import SessionRepository
+from app.core.database import get_async_db
+from app.repositories.job import AsyncJobRepository
+from app.repositories.message import AsyncMessageRepository
+from app.repositories.session import AsyncSessionRepository
+from app.repositories.usage import AsyncUsageRepository
 from app.services.agent.async_processing_service import (
     AsyncProcessingService,
 )
 from app.services.domain.message_service import (
-    MessageService,
+    AsyncMessageService,
     MessageTransformer,
 )
 from app.services.domain.session_service import (
-    SessionService,
+    AsyncSessionService,
     AutoTitleGenerator,
 )
+from app.services.domain.user_service import AsyncUserService
 from app.services.seo_agent_service import SEOAgentService
 
 
 # Repository Dependencies
-def get_session_repository(db: OrmSession = Depends(get_db)) -> SessionRepository:
-    return SessionRepository(db)
+def get_session_repository(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncSessionRepository:
+    return AsyncSessionRepository(db)
 
 
-def get_message_repository(db: OrmSession = Depends(get_db)) -> MessageRepository:
-    return MessageRepository(db)
+def get_message_repository(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncMessageRepository:
+    return AsyncMessageRepository(db)
 
 
-def get_job_repository(db: OrmSession = Depends(get_db)) -> JobRepository:
-    return JobRepository(db)
+def get_job_repository(db: AsyncSession = Depends(get_async_db)) -> AsyncJobRepository:
+    return AsyncJobRepository(db)
+
+
+def get_usage_repository(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncUsageRepository:
+    return AsyncUsageRepository(db)
 
 
 # Service Dependencies
@@ -45,27 +57,31 @@ def get_message_transformer() -> MessageTransformer:
     return MessageTransformer()
 
 
+def get_user_service(db: AsyncSession = Depends(get_async_db)) -> AsyncUserService:
+    return AsyncUserService(db)
+
+
 def get_session_service(
-    session_repo: SessionRepository = Depends(get_session_repository),
+    session_repo: AsyncSessionRepository = Depends(get_session_repository),
     title_generator: AutoTitleGenerator = Depends(get_title_generator),
-) -> SessionService:
-    return SessionService(session_repo, title_generator)
+) -> AsyncSessionService:
+    return AsyncSessionService(session_repo, title_generator)
 
 
 def get_message_service(
-    message_repo: MessageRepository = Depends(get_message_repository),
+    message_repo: AsyncMessageRepository = Depends(get_message_repository),
     transformer: MessageTransformer = Depends(get_message_transformer),
-) -> MessageService:
-    return MessageService(message_repo, transformer)
+) -> AsyncMessageService:
+    return AsyncMessageService(message_repo, transformer)
 
 
 def get_async_processing_service(
-    job_repo: JobRepository = Depends(get_job_repository),
+    job_repo: AsyncJobRepository = Depends(get_job_repository),
 ) -> AsyncProcessingService:
     return AsyncProcessingService(job_repo)
 
 
 def get_seo_agent_service(
-    message_service: MessageService = Depends(get_message_service),
+    message_service: AsyncMessageService = Depends(get_message_service),
 ) -> SEOAgentService:
     return SEOAgentService(message_service)
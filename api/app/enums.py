@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class JobStatus(str, Enum):
@@ -6,3 +6,12 @@ class JobStatus(str, Enum):
     GENERATING = "generating"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobPriority(IntEnum):
+    """Queue classes; lower values are claimed first."""
+
+    INTERACTIVE = 0  # follow-up in a session the user is working in
+    STANDARD = 1  # first message of a new session
+    BULK = 2  # queued while the user already has many jobs waiting
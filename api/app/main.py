@@ -8,9 +8,14 @@ import app.models
 from app.api.endpoints import api_router
 from app.api.endpoints import jobs as jobs_endpoints
 from app.api.endpoints import sessions as sessions_endpoints
+from app.api.endpoints import usage as usage_endpoints
 from app.api.middlewares import register_middlewares
-from app.core.database import engine, Base, DATABASE_URL
+from app.core.auth import get_jwt_verifier
+from app.core.database import engine, DATABASE_URL, dispose_engines, init_db
 from app.core.settings import get_settings
+from app.services.agent.job_queue import create_worker_pool
+from app.services.agent.llm import close_client as close_llm_client
+from app.services.agent.llm_cache import get_llm_cache
 
 
 def _ensure_sqlite_dir():
@@ -24,11 +29,33 @@ def _ensure_sqlite_dir():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _ensure_sqlite_dir()
-    Base.metadata.create_all(bind=engine)
+    init_db()
     insp = inspect(engine)
     print("Tables detected:", insp.get_table_names())
+
+    jwks = get_jwt_verifier().jwks
+    if get_settings().auth_jwks_prefetch:
+        try:
+            await jwks.prefetch()
+        except Exception as e:
+            # Not fatal: the first authenticated request will retry the fetch
+            print("JWKS prefetch failed:", e)
+
+    worker_pool = None
+    if get_settings().job_worker_mode == "inprocess":
+        worker_pool = create_worker_pool()
+        await worker_pool.start()
+
     yield
 
+    if worker_pool:
+        await worker_pool.stop()
+    await jwks.close()
+    if get_llm_cache():
+        get_llm_cache().close()
+    await close_llm_client()
+    await dispose_engines()
+
 
 def create_app() -> FastAPI:
     s = get_settings()
@@ -47,6 +74,7 @@ def create_app() -> FastAPI:
     app.include_router(api_router)
     app.include_router(sessions_endpoints.router)
     app.include_router(jobs_endpoints.router)
+    app.include_router(usage_endpoints.router)
 
     return app
 
@@ -3,3 +3,4 @@ from .job import Job
 from .message import Message
 from .session import Session
 from .user import User
+from .usage_record import UsageRecord
@@ -1,10 +1,11 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import String, ForeignKey, Float
+from sqlalchemy import String, ForeignKey, Float, Integer, DateTime, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
-from app.enums import JobStatus
+from app.enums import JobPriority, JobStatus
 from app.models.timestamp_mixin import SofiaTimestampMixin
 
 
@@ -33,9 +34,41 @@ class Job(Base, SofiaTimestampMixin):
     status: Mapped[JobStatus] = mapped_column(
         String, nullable=False, default=JobStatus.PENDING, index=True
     )
+    priority: Mapped[JobPriority] = mapped_column(
+        Integer, nullable=False, default=JobPriority.STANDARD, server_default="1"
+    )
 
+    # First claim by a worker, and the seconds the job waited for it
+    claimed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    queue_wait_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
     processing_time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
     error_message: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # Model usage, summed over every LLM call made for the job
+    prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    completion_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    tokens_used: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    llm_latency_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    prompt_size_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    bypass_cache: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="0"
+    )
+    deadline_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Client-supplied Idempotency-Key; cleared once it is older than the window
+    idempotency_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    # Queue leasing
+    leased_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     # Relationships
     user_message: Mapped["Message"] = relationship(
@@ -44,3 +77,10 @@ class Job(Base, SofiaTimestampMixin):
     agent_message: Mapped["Message"] = relationship(
         "Message", foreign_keys=[agent_message_id], post_update=True
     )
+
+    __table_args__ = (
+        Index(
+            "ux_jobs_user_idempotency_key", "user_id", "idempotency_key", unique=True
+        ),
+        Index("ix_jobs_status_priority_created", "status", "priority", "created_at"),
+    )
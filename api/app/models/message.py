@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import String, Text, ForeignKey, JSON, CheckConstraint
+from sqlalchemy import String, Text, ForeignKey, JSON, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -38,4 +38,7 @@ class Message(Base, SofiaTimestampMixin):
 
     __table_args__ = (
         CheckConstraint("role IN ('user','agent')", name="ck_messages_role"),
+        Index("ix_messages_session_role_created", "session_id", "role", "created_at"),
+        # Keyset pagination of a session's history
+        Index("ix_messages_session_created", "session_id", "created_at", "id"),
     )
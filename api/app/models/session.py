@@ -1,10 +1,12 @@
 import uuid
 
-from sqlalchemy import String
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
-from app.models.timestamp_mixin import SofiaTimestampMixin
+from app.models.timestamp_mixin import SofiaTimestampMixin, sofia_now
 
 
 class Session(Base, SofiaTimestampMixin):
@@ -16,9 +18,36 @@ class Session(Base, SofiaTimestampMixin):
     user_id: Mapped[str | None] = mapped_column(String(255), index=True, nullable=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
 
+    # Prompt context pointers, kept current by the message repository so a
+    # follow-up does not scan the session's history
+    anchor_message_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_agent_message_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Newest message time (creation time until the first one), for the sidebar
+    last_message_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        default=sofia_now,
+        nullable=True,
+        info={
+            "backfill": (
+                "UPDATE sessions SET last_message_at = COALESCE("
+                "(SELECT MAX(created_at) FROM messages"
+                " WHERE messages.session_id = sessions.id), created_at)"
+            )
+        },
+    )
+
     messages: Mapped[list["Message"]] = relationship(
         "Message",
         back_populates="session",
         cascade="all, delete-orphan",
         order_by="Message.created_at",
     )
+
+
+# Keyset pagination of a user's sessions, newest activity first
+Index(
+    "ix_sessions_user_last_message",
+    Session.user_id,
+    Session.last_message_at.desc(),
+    Session.id.desc(),
+)
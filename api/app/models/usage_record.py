@@ -0,0 +1,35 @@
+import uuid
+
+from sqlalchemy import String, ForeignKey, Float, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.timestamp_mixin import SofiaTimestampMixin
+
+
+class UsageRecord(Base, SofiaTimestampMixin):
+    """
+    Model usage of one job, synchronous generation or field regeneration.
+    Kept apart from jobs so it survives deleting the session they belong to.
+    """
+
+    __tablename__ = "usage_records"
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
+    # Not foreign keys: usage is kept after its session and jobs are deleted
+    session_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    job_id: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tokens_used: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    llm_latency_seconds: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
+    prompt_size_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (Index("ix_usage_records_user_created", "user_id", "created_at"),)
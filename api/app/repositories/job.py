@@ -1,9 +1,15 @@
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as OrmSession
 
-from app.enums import JobStatus
+from app.enums import JobPriority, JobStatus
 from app.models import Job
+from app.models.timestamp_mixin import sofia_now
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.GENERATING)
 
 
 class JobRepository:
@@ -36,3 +42,100 @@ class JobRepository:
         self._db.refresh(job)
 
         return job
+
+
+class AsyncJobRepository:
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def create_job(
+        self,
+        user_id: str,
+        session_id: str,
+        user_message_id: str,
+        bypass_cache: bool = False,
+        deadline_seconds: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+        priority: JobPriority = JobPriority.STANDARD,
+    ) -> Job:
+        job = Job(
+            user_id=user_id,
+            session_id=session_id,
+            user_message_id=user_message_id,
+            status=JobStatus.PENDING,
+            priority=priority,
+            bypass_cache=bypass_cache,
+            deadline_at=(
+                sofia_now() + timedelta(seconds=deadline_seconds)
+                if deadline_seconds
+                else None
+            ),
+            idempotency_key=idempotency_key,
+        )
+        self._db.add(job)
+        await self._db.flush()
+
+        return job
+
+    async def get_job_by_id(self, job_id: str) -> Optional[Job]:
+        result = await self._db.execute(select(Job).where(Job.id == job_id))
+        return result.scalars().first()
+
+    async def get_job_by_idempotency_key(
+        self, user_id: str, idempotency_key: str, since: datetime
+    ) -> Optional[Job]:
+        return await self._db.scalar(
+            select(Job).where(
+                Job.user_id == user_id,
+                Job.idempotency_key == idempotency_key,
+                Job.created_at >= since,
+            )
+        )
+
+    async def release_idempotency_key(
+        self, user_id: str, idempotency_key: str, before: datetime
+    ) -> None:
+        """Free a key whose window has passed so it can be used again."""
+        await self._db.execute(
+            update(Job)
+            .where(
+                Job.user_id == user_id,
+                Job.idempotency_key == idempotency_key,
+                Job.created_at < before,
+            )
+            .values(idempotency_key=None)
+        )
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Cancel a job that has not finished yet; False if it already has."""
+        result = await self._db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+            .values(
+                status=JobStatus.CANCELLED,
+                error_message="Job cancelled",
+                leased_by=None,
+                lease_expires_at=None,
+            )
+        )
+        return result.rowcount == 1
+
+    async def get_active_job_ids(self, session_id: str) -> List[str]:
+        result = await self._db.scalars(
+            select(Job.id).where(
+                Job.session_id == session_id, Job.status.in_(ACTIVE_STATUSES)
+            )
+        )
+        return list(result.all())
+
+    async def update_job_status(self, job: Job, status: JobStatus, **kwargs) -> Job:
+        job.status = status
+
+        for key, value in kwargs.items():
+            if hasattr(job, key):
+                setattr(job, key, value)
+
+        await self._db.commit()
+        await self._db.refresh(job)
+
+        return job
@@ -1,8 +1,118 @@
+from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import case, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as OrmSession
 
-from app.models import Message
+from app.models import Message, Session as SessionModel
+
+
+def _first_user_message_id(session_id: str):
+    return (
+        select(Message.id)
+        .where(Message.session_id == session_id, Message.role == "user")
+        .order_by(Message.created_at.asc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _touch_session(message: Message, **pointers):
+    """
+    Record a new message on its session: last_message_at for the session
+    list plus the given context pointers. updated_at is left alone; it
+    tracks edits to the session itself.
+    """
+    return (
+        update(SessionModel)
+        .where(SessionModel.id == message.session_id)
+        .values(
+            last_message_at=message.created_at,
+            updated_at=SessionModel.updated_at,
+            **pointers,
+        )
+    )
+
+
+def _user_message_written(message: Message):
+    # Sessions created before the pointer existed backfill it on their next message
+    anchor = func.coalesce(
+        SessionModel.anchor_message_id, _first_user_message_id(message.session_id)
+    )
+    return _touch_session(message, anchor_message_id=anchor)
+
+
+def _agent_message_written(message: Message):
+    return _touch_session(message, last_agent_message_id=message.id)
+
+
+def _message_removed(message: Message):
+    """
+    Undo _touch_session for a deleted message: pointers to it are cleared, so
+    reads fall back to the history query, and last_message_at goes back to
+    the newest remaining message.
+    """
+
+    def unless_removed(pointer):
+        return case((pointer == message.id, None), else_=pointer)
+
+    newest = (
+        select(func.max(Message.created_at))
+        .where(Message.session_id == message.session_id)
+        .scalar_subquery()
+    )
+    return (
+        update(SessionModel)
+        .where(SessionModel.id == message.session_id)
+        .values(
+            anchor_message_id=unless_removed(SessionModel.anchor_message_id),
+            last_agent_message_id=unless_removed(SessionModel.last_agent_message_id),
+            last_message_at=func.coalesce(newest, SessionModel.created_at),
+            updated_at=SessionModel.updated_at,
+        )
+    )
+
+
+def _anchor_message(session_id: str):
+    return (
+        select(Message)
+        .join(SessionModel, SessionModel.anchor_message_id == Message.id)
+        .where(SessionModel.id == session_id)
+    )
+
+
+def _last_agent_message(session_id: str):
+    return (
+        select(Message)
+        .join(SessionModel, SessionModel.last_agent_message_id == Message.id)
+        .where(SessionModel.id == session_id)
+    )
+
+
+def _session_messages_page(
+    session_id: str,
+    limit: int,
+    after: Optional[tuple[datetime, str]],
+    before: Optional[tuple[datetime, str]],
+):
+    """
+    Keyset page over ix_messages_session_created. Without an `after` cursor
+    the page ends at `before` (or at the newest message) and is read newest
+    first; callers put it back in chronological order.
+    """
+    key = tuple_(Message.created_at, Message.id)
+    query = select(Message).where(Message.session_id == session_id)
+    if after is not None:
+        return (
+            query.where(key > tuple_(*after))
+            .order_by(Message.created_at.asc(), Message.id.asc())
+            .limit(limit)
+        )
+    if before is not None:
+        query = query.where(key < tuple_(*before))
+
+    return query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
 
 
 class MessageRepository:
@@ -17,6 +127,7 @@ class MessageRepository:
         )
         self._db.add(message)
         self._db.flush()
+        self._db.execute(_user_message_written(message))
 
         return message
 
@@ -33,22 +144,34 @@ class MessageRepository:
         )
         self._db.add(message)
         self._db.flush()
+        self._db.execute(_agent_message_written(message))
 
         return message
 
+    def delete_message(self, message: Message) -> None:
+        self._db.delete(message)
+        self._db.flush()
+        self._db.execute(_message_removed(message))
+
     def get_session_messages(
-        self, session_id: str, limit: int, offset: int
+        self,
+        session_id: str,
+        limit: int,
+        after: Optional[tuple[datetime, str]] = None,
+        before: Optional[tuple[datetime, str]] = None,
     ) -> List[Message]:
-        return (
-            self._db.query(Message)
-            .filter(Message.session_id == session_id)
-            .order_by(Message.created_at.asc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+        messages = list(
+            self._db.scalars(
+                _session_messages_page(session_id, limit, after, before)
+            ).all()
         )
+        return messages if after is not None else messages[::-1]
 
     def get_first_message_of_session(self, session_id: str) -> Optional[Message]:
+        anchor = self._db.scalar(_anchor_message(session_id))
+        if anchor is not None:
+            return anchor
+
         return (
             self._db.query(Message)
             .filter(Message.session_id == session_id, Message.role == "user")
@@ -57,9 +180,99 @@ class MessageRepository:
         )
 
     def get_last_agent_message(self, session_id: str) -> Optional[Message]:
+        last = self._db.scalar(_last_agent_message(session_id))
+        if last is not None:
+            return last
+
         return (
             self._db.query(Message)
             .filter(Message.session_id == session_id, Message.role == "agent")
             .order_by(Message.created_at.desc())
             .first()
         )
+
+
+class AsyncMessageRepository:
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def create_user_message(self, session_id: str, content: str) -> Message:
+        message = Message(
+            session_id=session_id,
+            role="user",
+            message_content=content,
+        )
+        self._db.add(message)
+        await self._db.flush()
+        await self._db.execute(_user_message_written(message))
+
+        return message
+
+    async def create_agent_message(self, session_id: str, suggestions: dict) -> Message:
+        message = Message(
+            session_id=session_id,
+            role="agent",
+            message_content="",
+            suggested_page_title=suggestions.get("page_title"),
+            suggested_page_content=suggestions.get("page_content"),
+            suggested_title_tag=suggestions.get("title_tag"),
+            suggested_meta_description=suggestions.get("meta_description"),
+            suggested_meta_keywords=suggestions.get("meta_keywords"),
+        )
+        self._db.add(message)
+        await self._db.flush()
+        await self._db.execute(_agent_message_written(message))
+
+        return message
+
+    async def delete_message(self, message: Message) -> None:
+        await self._db.delete(message)
+        await self._db.flush()
+        await self._db.execute(_message_removed(message))
+
+    async def get_session_messages(
+        self,
+        session_id: str,
+        limit: int,
+        after: Optional[tuple[datetime, str]] = None,
+        before: Optional[tuple[datetime, str]] = None,
+    ) -> List[Message]:
+        result = await self._db.scalars(
+            _session_messages_page(session_id, limit, after, before)
+        )
+        messages = list(result.all())
+        return messages if after is not None else messages[::-1]
+
+    async def get_first_message_of_session(self, session_id: str) -> Optional[Message]:
+        anchor = await self._db.scalar(_anchor_message(session_id))
+        if anchor is not None:
+            return anchor
+
+        result = await self._db.execute(
+            select(Message)
+            .where(Message.session_id == session_id, Message.role == "user")
+            .order_by(Message.created_at.asc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_last_agent_message(self, session_id: str) -> Optional[Message]:
+        last = await self._db.scalar(_last_agent_message(session_id))
+        if last is not None:
+            return last
+
+        result = await self._db.execute(
+            select(Message)
+            .where(Message.session_id == session_id, Message.role == "agent")
+            .order_by(Message.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_message(self, session_id: str, message_id: str) -> Optional[Message]:
+        result = await self._db.execute(
+            select(Message).where(
+                Message.id == message_id, Message.session_id == session_id
+            )
+        )
+        return result.scalars().first()
@@ -1,9 +1,27 @@
+from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import func, desc
+from sqlalchemy import delete, desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as OrmSession
 
-from app.models import Session as SessionModel, Message
+from app.models import Session as SessionModel, Job
+from app.repositories.job import AsyncJobRepository
+
+
+def _user_sessions_page(
+    user_id: str, limit: int, after: Optional[tuple[datetime, str]]
+):
+    """Keyset page over ix_sessions_user_last_message, newest activity first."""
+    query = select(SessionModel).where(SessionModel.user_id == user_id)
+    if after is not None:
+        query = query.where(
+            tuple_(SessionModel.last_message_at, SessionModel.id) < tuple_(*after)
+        )
+
+    return query.order_by(
+        desc(SessionModel.last_message_at), desc(SessionModel.id)
+    ).limit(limit)
 
 
 class SessionRepository:
@@ -26,33 +44,9 @@ class SessionRepository:
         )
 
     def get_user_sessions(
-        self, user_id: str, limit: int, offset: int
-    ) -> List[tuple[SessionModel, Optional[str]]]:
-        latest_message_subquery = (
-            self._db.query(
-                Message.session_id,
-                func.max(Message.created_at).label("last_message_at"),
-            )
-            .group_by(Message.session_id)
-            .subquery()
-        )
-
-        sessions_query = (
-            self._db.query(SessionModel, latest_message_subquery.c.last_message_at)
-            .outerjoin(
-                latest_message_subquery,
-                SessionModel.id == latest_message_subquery.c.session_id,
-            )
-            .filter(SessionModel.user_id == user_id)
-            .order_by(
-                desc(latest_message_subquery.c.last_message_at),
-                desc(SessionModel.created_at),  # fallback for sessions without messages
-            )
-            .offset(offset)
-            .limit(limit)
-        )
-
-        return sessions_query.all()
+        self, user_id: str, limit: int, after: Optional[tuple[datetime, str]] = None
+    ) -> List[SessionModel]:
+        return list(self._db.scalars(_user_sessions_page(user_id, limit, after)).all())
 
     def update_session(self, session: SessionModel, **kwargs) -> SessionModel:
         for key, value in kwargs.items():
@@ -64,5 +58,57 @@ class SessionRepository:
         return session
 
     def delete_session(self, session: SessionModel) -> None:
+        # Jobs reference the session's messages, so they must go first when
+        # foreign keys are enforced
+        self._db.execute(delete(Job).where(Job.session_id == session.id))
         self._db.delete(session)
         self._db.commit()
+
+
+class AsyncSessionRepository:
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def create_session(self, user_id: str, title: str) -> SessionModel:
+        session = SessionModel(user_id=user_id, title=title)
+        self._db.add(session)
+        await self._db.flush()
+        return session
+
+    async def get_session_by_id(
+        self, session_id: str, user_id: str
+    ) -> Optional[SessionModel]:
+        result = await self._db.execute(
+            select(SessionModel).where(
+                SessionModel.id == session_id, SessionModel.user_id == user_id
+            )
+        )
+        return result.scalars().first()
+
+    async def get_user_sessions(
+        self, user_id: str, limit: int, after: Optional[tuple[datetime, str]] = None
+    ) -> List[SessionModel]:
+        result = await self._db.scalars(_user_sessions_page(user_id, limit, after))
+        return list(result.all())
+
+    async def update_session(self, session: SessionModel, **kwargs) -> SessionModel:
+        for key, value in kwargs.items():
+            setattr(session, key, value)
+
+        await self._db.commit()
+        await self._db.refresh(session)
+
+        return session
+
+    async def delete_session(self, session: SessionModel) -> List[str]:
+        """Returns the ids of the unfinished jobs deleted with the session."""
+        active_job_ids = await AsyncJobRepository(self._db).get_active_job_ids(
+            session.id
+        )
+        # Jobs reference the session's messages, so they must go first when
+        # foreign keys are enforced
+        await self._db.execute(delete(Job).where(Job.session_id == session.id))
+        await self._db.delete(session)
+        await self._db.commit()
+
+        return active_job_ids
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, exists, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Job, UsageRecord
+from app.services.agent.usage import LLMUsage
+
+JOB = "job"
+GENERATE = "generate"
+REGENERATE = "regenerate"
+
+
+class AsyncUsageRepository:
+    def __init__(self, db: AsyncSession):
+        self._db = db
+
+    async def add_record(
+        self,
+        user_id: str,
+        kind: str,
+        usage: LLMUsage,
+        session_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+    ) -> UsageRecord:
+        record = UsageRecord(
+            user_id=user_id,
+            session_id=session_id,
+            job_id=job_id,
+            kind=kind,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            tokens_used=usage.total_tokens,
+            llm_latency_seconds=usage.latency_seconds,
+            prompt_size_tokens=usage.prompt_size_tokens,
+        )
+        self._db.add(record)
+        await self._db.flush()
+
+        return record
+
+    async def usage_by_day(
+        self, since: datetime, user_id: Optional[str] = None
+    ) -> list:
+        """
+        Token usage recorded since `since`, grouped by user and day. Jobs
+        finished before usage records were written still count from the
+        jobs table.
+        """
+        recorded = exists().where(UsageRecord.job_id == Job.id)
+        legacy_jobs = select(
+            Job.user_id,
+            Job.created_at,
+            literal(JOB).label("kind"),
+            Job.prompt_tokens,
+            Job.completion_tokens,
+            Job.tokens_used,
+            Job.llm_latency_seconds,
+        ).where(Job.created_at >= since, ~recorded)
+        records = select(
+            UsageRecord.user_id,
+            UsageRecord.created_at,
+            UsageRecord.kind,
+            UsageRecord.prompt_tokens,
+            UsageRecord.completion_tokens,
+            UsageRecord.tokens_used,
+            UsageRecord.llm_latency_seconds,
+        ).where(UsageRecord.created_at >= since)
+        if user_id:
+            legacy_jobs = legacy_jobs.where(Job.user_id == user_id)
+            records = records.where(UsageRecord.user_id == user_id)
+
+        calls = union_all(legacy_jobs, records).subquery()
+        day = func.date(calls.c.created_at).label("day")
+        stmt = (
+            select(
+                calls.c.user_id,
+                day,
+                func.sum(case((calls.c.kind == JOB, 1), else_=0)).label("jobs"),
+                func.sum(case((calls.c.kind == GENERATE, 1), else_=0)).label(
+                    "sync_generations"
+                ),
+                func.sum(case((calls.c.kind == REGENERATE, 1), else_=0)).label(
+                    "regenerations"
+                ),
+                func.coalesce(func.sum(calls.c.prompt_tokens), 0).label(
+                    "prompt_tokens"
+                ),
+                func.coalesce(func.sum(calls.c.completion_tokens), 0).label(
+                    "completion_tokens"
+                ),
+                func.coalesce(func.sum(calls.c.tokens_used), 0).label("tokens_used"),
+                func.coalesce(func.sum(calls.c.llm_latency_seconds), 0.0).label(
+                    "llm_latency_seconds"
+                ),
+            )
+            .group_by(calls.c.user_id, day)
+            .order_by(day.desc(), calls.c.user_id)
+        )
+
+        result = await self._db.execute(stmt)
+        return result.all()
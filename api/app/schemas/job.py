@@ -21,7 +21,12 @@ class JobStatusResponse(BaseModel):
     job_id: str
     status: JobStatus
     agent_message: Optional[MessageOut] = None
+    queue_wait_seconds: Optional[float] = None
     processing_time_seconds: Optional[float] = None
     tokens_used: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    llm_latency_seconds: Optional[float] = None
+    prompt_size_tokens: Optional[int] = None
     error_message: Optional[str] = None
     updated_at: str
@@ -7,6 +7,23 @@ from app.enums import JobStatus
 
 class MessageCreateRequest(BaseModel):
     message: str = Field(..., min_length=1)
+    bypass_cache: bool = Field(
+        False, description="Always call the model instead of reusing a cached answer"
+    )
+    bulk: bool = Field(
+        False, description="Queue behind interactive work, e.g. for scripted batches"
+    )
+
+
+class RegenerateRequest(BaseModel):
+    instructions: Optional[str] = Field(
+        None, max_length=2000, description="Optional guidance for the new values"
+    )
+    # Asking again is asking for different values, so the cache is skipped
+    # unless the caller opts in to reusing the last answer
+    bypass_cache: bool = Field(
+        True, description="Set to false to reuse a cached answer for the same request"
+    )
 
 
 class MessageOut(BaseModel):
@@ -9,6 +9,12 @@ from app.schemas.message import MessageOut
 class SessionCreateRequest(BaseModel):
     message: str = Field(..., min_length=1)
     title: Optional[str] = None
+    bypass_cache: bool = Field(
+        False, description="Always call the model instead of reusing a cached answer"
+    )
+    bulk: bool = Field(
+        False, description="Queue behind interactive work, e.g. for scripted batches"
+    )
 
 
 class SessionCreateResponse(BaseModel):
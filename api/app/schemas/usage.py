@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class UsageDay(BaseModel):
+    day: str
+    user_id: str
+    jobs: int
+    sync_generations: int = 0
+    regenerations: int = 0
+    prompt_tokens: int
+    completion_tokens: int
+    tokens_used: int
+    llm_latency_seconds: float
@@ -1,15 +1,22 @@
 # app/services/agent_graph.py
 from __future__ import annotations
 
+import json
 from typing import List
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field, ValidationError
 
-from .llm import chat_json
+from app.core.settings import get_settings
+
+from .llm import chat_json, chat_json_stream
+from .llm_scheduler import estimate_tokens
+from .partial_json import PartialJSONParser
 from .prompt_builder import SEOPromptBuilder
-from .prompts import SYSTEM_PROMPT
+from .prompts import FOLLOWUP_SYSTEM_PROMPT, SYSTEM_PROMPT, regenerate_system_prompt
 from .score import score_result
+from .usage import record_prompt_size
 
 
 class Suggestion(BaseModel):
@@ -20,28 +27,91 @@ class Suggestion(BaseModel):
     meta_keywords: List[str] = Field(default_factory=list)
 
 
-prompt_builder = SEOPromptBuilder()
+prompt_builder = SEOPromptBuilder(token_budget=get_settings().prompt_token_budget)
+
+
+async def _stream_raw(system: str, user: str, use_cache: bool) -> dict:
+    """Run the completion in streaming mode, emitting partial fields as they parse."""
+    writer = get_stream_writer()
+    parser = PartialJSONParser()
+    chunks = []
+
+    async for chunk in chat_json_stream(system, user, use_cache=use_cache):
+        chunks.append(chunk)
+        for kind, field, value in parser.feed(chunk):
+            if kind == "delta":
+                writer({"event": "delta", "field": field, "delta": value})
+            else:
+                writer({"event": "field", "field": field, "value": value})
+
+    return json.loads("".join(chunks))
+
+
+def _is_patch(state: dict) -> bool:
+    return bool(
+        (state.get("patch_mode") or state.get("regenerate_fields"))
+        and state.get("current_draft")
+    )
+
+
+def _system_prompt(state: dict) -> str:
+    if state.get("regenerate_fields"):
+        return regenerate_system_prompt(state["regenerate_fields"])
+    if _is_patch(state):
+        return FOLLOWUP_SYSTEM_PROMPT
+    return SYSTEM_PROMPT
+
+
+def _pick(raw: dict, field: str):
+    return raw.get(field) or raw.get(f"suggested_{field}")
 
 
 async def suggest_node(state: dict):
-    raw = await chat_json(SYSTEM_PROMPT, prompt_builder.build_user_payload(state))
+    patch = _is_patch(state)
+    system = _system_prompt(state)
+    if state.get("regenerate_fields"):
+        user_payload = prompt_builder.build_regenerate_payload(state)
+    else:
+        user_payload = prompt_builder.build_user_payload(state)
+    record_prompt_size(estimate_tokens(system, user_payload))
+    use_cache = not state.get("bypass_cache")
+    if state.get("stream"):
+        raw = await _stream_raw(system, user_payload, use_cache)
+    else:
+        raw = await chat_json(system, user_payload, use_cache=use_cache)
+
+    if patch:
+        # Only the fields the model chose to change; merge_node fills the rest
+        changes = {}
+        fields = state.get("regenerate_fields") or Suggestion.model_fields
+        for field in fields:
+            value = _pick(raw, field)
+            if value is not None:
+                changes[field] = value
+        # The graph state is replaced by each node's output, so carry the draft
+        return {"current_draft": state["current_draft"], "changes": changes}
 
     suggestions = {
-        "page_title": raw.get("page_title") or raw.get("suggested_page_title"),
-        "page_content": raw.get("page_content")
-        or raw.get("suggested_page_content")
-        or "",
-        "title_tag": raw.get("title_tag") or raw.get("suggested_title_tag"),
-        "meta_description": raw.get("meta_description")
-        or raw.get("suggested_meta_description"),
-        "meta_keywords": raw.get("meta_keywords")
-        or raw.get("suggested_meta_keywords")
-        or [],
+        "page_title": _pick(raw, "page_title"),
+        "page_content": _pick(raw, "page_content") or "",
+        "title_tag": _pick(raw, "title_tag"),
+        "meta_description": _pick(raw, "meta_description"),
+        "meta_keywords": _pick(raw, "meta_keywords") or [],
     }
 
     return {"suggestions": suggestions}
 
 
+def merge_node(state: dict):
+    """Apply a follow-up's changed fields onto the previous draft."""
+    if "changes" not in state:
+        return state
+
+    draft = dict(state["current_draft"])
+    draft.update(state.get("changes") or {})
+    return {"suggestions": draft}
+
+
 def validate_node(state: dict):
     data = state["suggestions"]
     try:
@@ -62,11 +132,13 @@ def validate_node(state: dict):
 
 _graph = StateGraph(dict)
 _graph.add_node("suggest", suggest_node)
+_graph.add_node("merge", merge_node)
 _graph.add_node("validate", validate_node)
 
 _graph.set_entry_point("suggest")
 
-_graph.add_edge("suggest", "validate")
+_graph.add_edge("suggest", "merge")
+_graph.add_edge("merge", "validate")
 _graph.add_edge("validate", END)
 
 seo_graph = _graph.compile()
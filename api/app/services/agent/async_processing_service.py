@@ -1,18 +1,67 @@
-from app.models.job import Job, JobStatus
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core.settings import get_settings
+from app.enums import JobPriority
+from app.models.job import Job
 from app.models.message import Message
-from app.repositories.job import JobRepository
+from app.models.timestamp_mixin import sofia_now
+from app.repositories.job import AsyncJobRepository
 from app.schemas.message import MessageOut, AsyncMessageResponse
 from app.schemas.session import AsyncSessionStartResponse
 
 
+def _idempotency_cutoff() -> datetime:
+    return sofia_now() - timedelta(seconds=get_settings().idempotency_window_seconds)
+
+
 class AsyncProcessingService:
-    def __init__(self, job_repo: JobRepository):
+    def __init__(self, job_repo: AsyncJobRepository):
         self._job_repo = job_repo
 
-    def create_processing_job(
-        self, user_id: str, session_id: str, user_message: Message
+    async def create_processing_job(
+        self,
+        user_id: str,
+        session_id: str,
+        user_message: Message,
+        bypass_cache: bool = False,
+        idempotency_key: Optional[str] = None,
+        followup: bool = False,
+        bulk: bool = False,
     ) -> Job:
-        return self._job_repo.create_job(user_id, session_id, user_message.id)
+        if idempotency_key:
+            await self._job_repo.release_idempotency_key(
+                user_id, idempotency_key, _idempotency_cutoff()
+            )
+
+        # The queue also treats every job of a user with a large backlog as
+        # bulk when it claims them
+        if bulk:
+            priority = JobPriority.BULK
+        elif followup:
+            priority = JobPriority.INTERACTIVE
+        else:
+            priority = JobPriority.STANDARD
+
+        return await self._job_repo.create_job(
+            user_id,
+            session_id,
+            user_message.id,
+            bypass_cache,
+            idempotency_key=idempotency_key,
+            priority=priority,
+        )
+
+    async def find_idempotent_job(
+        self, user_id: str, idempotency_key: str
+    ) -> Optional[Job]:
+        """The job an Idempotency-Key created within the window, if any."""
+        return await self._job_repo.get_job_by_idempotency_key(
+            user_id, idempotency_key, _idempotency_cutoff()
+        )
+
+    async def cancel_job(self, job_id: str) -> bool:
+        return await self._job_repo.cancel_job(job_id)
 
     def build_session_start_response(
         self, session_id: str, session_title: str, job: Job, user_message: Message
@@ -22,7 +71,7 @@ class AsyncProcessingService:
             session_title=session_title,
             job_id=job.id,
             user_message=self._build_message_out(user_message),
-            status=JobStatus.PENDING,
+            status=job.status,
         )
 
     def build_message_response(
@@ -33,7 +82,7 @@ class AsyncProcessingService:
             session_id=session_id,
             job_id=job.id,
             user_message=self._build_message_out(user_message),
-            status=JobStatus.PENDING,
+            status=job.status,
         )
 
     def _build_message_out(self, message: Message) -> MessageOut:
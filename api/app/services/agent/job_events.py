@@ -0,0 +1,147 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class JobEventBroker:
+    """
+    In-process fan-out of job progress events to stream subscribers.
+
+    Events published while a job is running are buffered so that a subscriber
+    connecting mid-generation first receives everything it missed. The buffer
+    is compacted as it grows: consecutive deltas of a field are merged and a
+    field's complete value replaces its deltas, so it holds about one event
+    per field. close() delivers a terminating None to every subscriber and
+    drops the channel; discard() only frees the buffer.
+
+    Events only reach subscribers in the process running the job. With
+    JOB_WORKER_MODE=external a stream gets no deltas, just the outcome once
+    its periodic status check sees the job finish.
+    """
+
+    def __init__(self):
+        self._history: Dict[str, List[dict]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self._history.get(job_id, []):
+            queue.put_nowait(event)
+
+        self._subscribers.setdefault(job_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id)
+        if not queues:
+            return
+
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(job_id, None)
+
+    def _remember(self, job_id: str, event: dict) -> None:
+        history = self._history.setdefault(job_id, [])
+        kind, field = event.get("event"), event.get("field")
+        last = history[-1] if history else {}
+
+        if kind == "delta" and last.get("event") == "delta" and last["field"] == field:
+            history[-1] = {**last, "delta": last["delta"] + event["delta"]}
+        elif kind == "field":
+            history[:] = [
+                e
+                for e in history
+                if not (e.get("event") == "delta" and e.get("field") == field)
+            ]
+            history.append(event)
+        else:
+            history.append(event)
+
+    def publish(self, job_id: str, event: dict) -> None:
+        self._remember(job_id, event)
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(event)
+
+    def discard(self, job_id: str) -> None:
+        """
+        Free the buffer of a job whose run ended without closing the channel
+        (its task was cancelled); subscribers stay and pick up the outcome
+        from the database.
+        """
+        self._history.pop(job_id, None)
+
+    def close(self, job_id: str) -> None:
+        self._history.pop(job_id, None)
+        for queue in self._subscribers.pop(job_id, []):
+            queue.put_nowait(None)
+
+
+class JobCompletionNotifier:
+    """
+    In-process completion signals for long-polling job status requests.
+
+    A waiter registers with watch() *before* reading the job from the database
+    so a completion that lands between the read and the wait is not missed.
+    """
+
+    def __init__(self):
+        self._events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @contextmanager
+    def watch(self, job_id: str) -> Iterator[asyncio.Event]:
+        event = self._events.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            yield event
+        finally:
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                self._waiters.pop(job_id, None)
+                self._events.pop(job_id, None)
+
+    def notify(self, job_id: str) -> None:
+        event = self._events.get(job_id)
+        if event:
+            event.set()
+
+
+class RunningJobs:
+    """
+    Tasks of the jobs this process is running, so a cancellation can stop
+    the model call instead of letting it finish into a result nobody reads.
+    Workers in other processes notice through their lease heartbeat.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @contextmanager
+    def track(self, job_id: str, task: asyncio.Task) -> Iterator[None]:
+        self._tasks[job_id] = task
+        try:
+            yield
+        finally:
+            if self._tasks.get(job_id) is task:
+                del self._tasks[job_id]
+
+    def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+
+job_events = JobEventBroker()
+job_completions = JobCompletionNotifier()
+running_jobs = RunningJobs()
+
+
+def announce_cancelled(job_id: str, detail: str = "Job cancelled") -> None:
+    """Stop a cancelled job's task here and release anyone waiting on it."""
+    running_jobs.cancel(job_id)
+    job_completions.notify(job_id)
+    job_events.publish(job_id, {"event": "error", "detail": detail})
+    job_events.close(job_id)
@@ -1,31 +1,64 @@
+import asyncio
 import time
 from dataclasses import dataclass
 from typing import Optional
 
-from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.job import Job, JobStatus
 from app.models.message import Message
 from app.models.session import Session as SessionModel
-from app.repositories.message import MessageRepository
-from app.services.domain.message_service import MessageService, MessageTransformer
+from app.models.timestamp_mixin import sofia_now
+from app.repositories.job import ACTIVE_STATUSES
+from app.repositories.message import AsyncMessageRepository
+from app.repositories.usage import JOB, AsyncUsageRepository
+from app.services.agent.job_events import job_events, job_completions
+from app.services.agent.usage import LLMUsage, track_usage
+from app.services.domain.message_service import (
+    AsyncMessageService,
+    MessageTransformer,
+)
 from app.services.seo_agent_service import SEOAgentService
 
 
+class JobCancelledError(Exception):
+    """The job was cancelled or deleted while it ran; its result is dropped."""
+
+
+class JobDeadlineExceededError(Exception):
+    pass
+
+
+def _seconds_left(job: Job) -> Optional[float]:
+    if job.deadline_at is None:
+        return None
+
+    now = sofia_now()
+    if job.deadline_at.tzinfo is None:
+        # SQLite hands back the stored Sofia wall time without its offset
+        now = now.replace(tzinfo=None)
+    return (job.deadline_at - now).total_seconds()
+
+
 @dataclass
 class JobContext:
     job: Job
     session: SessionModel
     user_message: Message
-    db_session: OrmSession
+    db_session: AsyncSession
     start_time: float
     ai_service: Optional[SEOAgentService] = None
     suggestions: Optional[dict] = None
     agent_message: Optional[Message] = None
+    usage: Optional[LLMUsage] = None
+    # Kept apart from the job, which a rollback expires
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
 
 
 class JobPipeline:
-    async def process(self, job_id: str, db_session: OrmSession) -> None:
+    async def process(self, job_id: str, db_session: AsyncSession) -> None:
         context = JobContext(
             job=None,
             session=None,
@@ -42,26 +75,29 @@ class JobPipeline:
             await self._create_agent_message(context)
             await self._complete_job(context)
 
+        except JobCancelledError:
+            await db_session.rollback()
         except Exception as e:
             await self._handle_error(context, e)
 
     async def _load_job_data(self, job_id: str, context: JobContext) -> None:
-        context.job = context.db_session.query(Job).filter(Job.id == job_id).first()
+        db = context.db_session
+        context.job = await db.scalar(select(Job).where(Job.id == job_id))
         if not context.job:
             raise ValueError("Job not found")
+        if context.job.status not in ACTIVE_STATUSES:
+            raise JobCancelledError(context.job.id)
+        context.user_id = context.job.user_id
+        context.session_id = context.job.session_id
 
         context.job.status = JobStatus.GENERATING
-        context.db_session.commit()
+        await db.commit()
 
-        context.session = (
-            context.db_session.query(SessionModel)
-            .filter(SessionModel.id == context.job.session_id)
-            .first()
+        context.session = await db.scalar(
+            select(SessionModel).where(SessionModel.id == context.job.session_id)
         )
-        context.user_message = (
-            context.db_session.query(Message)
-            .filter(Message.id == context.job.user_message_id)
-            .first()
+        context.user_message = await db.scalar(
+            select(Message).where(Message.id == context.job.user_message_id)
         )
 
     async def _validate_data(self, context: JobContext) -> None:
@@ -69,23 +105,45 @@ class JobPipeline:
             raise ValueError("Session or user message not found")
 
     async def _initialize_services(self, context: JobContext) -> None:
-        message_repo = MessageRepository(context.db_session)
+        message_repo = AsyncMessageRepository(context.db_session)
         message_transformer = MessageTransformer()
-        message_service = MessageService(message_repo, message_transformer)
+        message_service = AsyncMessageService(message_repo, message_transformer)
         context.ai_service = SEOAgentService(message_service)
 
     async def _generate_suggestions(self, context: JobContext) -> None:
-        first_message = context.ai_service._message_service.get_first_message(
-            context.job.session_id
-        )
-        is_first_message = (
-            first_message is None or first_message.id == context.user_message.id
-        )
+        seconds_left = _seconds_left(context.job)
+        if seconds_left is not None and seconds_left <= 0:
+            raise JobDeadlineExceededError("Job deadline exceeded before it started")
+
+        with track_usage() as context.usage:
+            try:
+                # Cancels the in-flight model call when the deadline passes
+                async with asyncio.timeout(seconds_left):
+                    await self._run_agent(context)
+            except TimeoutError:
+                raise JobDeadlineExceededError("Job deadline exceeded")
+
+    async def _run_agent(self, context: JobContext) -> None:
+        job_id = context.job.id
+
+        def publish(event: dict) -> None:
+            job_events.publish(job_id, event)
+
+        anchor_id = context.session.anchor_message_id
+        if anchor_id is None:
+            first_message = await context.ai_service._message_service.get_first_message(
+                context.job.session_id
+            )
+            anchor_id = first_message.id if first_message else None
+        is_first_message = anchor_id in (None, context.user_message.id)
 
         if is_first_message:
             context.suggestions = (
                 await context.ai_service.process_first_message_new_session(
-                    context.session.title, context.user_message.message_content
+                    context.session.title,
+                    context.user_message.message_content,
+                    on_event=publish,
+                    bypass_cache=context.job.bypass_cache,
                 )
             )
         else:
@@ -94,41 +152,114 @@ class JobPipeline:
                     context.job.session_id,
                     context.session.title,
                     context.user_message.message_content,
+                    on_event=publish,
+                    bypass_cache=context.job.bypass_cache,
                 )
             )
 
     async def _create_agent_message(self, context: JobContext) -> None:
         suggestions = self._normalize_suggestions(context.suggestions)
 
-        context.agent_message = Message(
-            session_id=context.job.session_id,
-            role="agent",
-            message_content="",
-            suggested_page_title=suggestions["page_title"],
-            suggested_page_content=suggestions["page_content"],
-            suggested_title_tag=suggestions["title_tag"],
-            suggested_meta_description=suggestions["meta_description"],
-            suggested_meta_keywords=suggestions["meta_keywords"],
-        )
-
-        context.db_session.add(context.agent_message)
-        context.db_session.flush()
+        context.agent_message = await AsyncMessageRepository(
+            context.db_session
+        ).create_agent_message(context.job.session_id, suggestions)
 
     async def _complete_job(self, context: JobContext) -> None:
+        job_id = context.job.id
         processing_time = time.time() - context.start_time
-        context.job.agent_message_id = context.agent_message.id
-        context.job.status = JobStatus.COMPLETED
-        context.job.processing_time_seconds = processing_time
-        context.db_session.commit()
+        await self._finish(
+            context,
+            job_id,
+            agent_message_id=context.agent_message.id,
+            status=JobStatus.COMPLETED,
+            processing_time_seconds=processing_time,
+            **self._usage_values(context),
+        )
+        job_completions.notify(job_id)
+
+        job_events.publish(
+            job_id,
+            {
+                "event": "message",
+                "message": MessageTransformer()
+                .to_message_out(context.agent_message)
+                .model_dump(),
+            },
+        )
+        job_events.close(job_id)
 
     async def _handle_error(self, context: JobContext, error: Exception) -> None:
         processing_time = time.time() - context.start_time
 
         if context.job:
-            context.job.status = JobStatus.FAILED
-            context.job.error_message = str(error)[:500]
-            context.job.processing_time_seconds = processing_time
-            context.db_session.commit()
+            # Read before the rollback expires the object
+            job_id = context.job.id
+            await context.db_session.rollback()
+            error_message = str(error)[:500]
+            try:
+                await self._finish(
+                    context,
+                    job_id,
+                    status=JobStatus.FAILED,
+                    error_message=error_message,
+                    processing_time_seconds=processing_time,
+                    **self._usage_values(context),
+                )
+            except JobCancelledError:
+                return
+            job_completions.notify(job_id)
+
+            job_events.publish(
+                job_id,
+                {"event": "error", "detail": error_message},
+            )
+            job_events.close(job_id)
+
+    async def _finish(self, context: JobContext, job_id: str, **values) -> None:
+        """
+        Write the job's outcome, unless it was cancelled (or deleted with its
+        session) in the meantime; then everything it wrote is rolled back.
+        """
+        db = context.db_session
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.GENERATING)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            await db.rollback()
+            # The tokens were spent whether or not the result is kept
+            if context.usage is not None and context.usage.calls:
+                await self._record_usage(context, job_id)
+                await db.commit()
+            raise JobCancelledError(job_id)
+
+        await self._record_usage(context, job_id)
+        await db.commit()
+
+    async def _record_usage(self, context: JobContext, job_id: str) -> None:
+        """Copy the job's usage to usage_records, which outlive the job."""
+        await AsyncUsageRepository(context.db_session).add_record(
+            context.user_id,
+            JOB,
+            context.usage or LLMUsage(),
+            context.session_id,
+            job_id=job_id,
+        )
+
+    def _usage_values(self, context: JobContext) -> dict:
+        usage = context.usage
+        if usage is None:
+            return {}
+
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "tokens_used": usage.total_tokens,
+            "llm_latency_seconds": usage.latency_seconds,
+            "prompt_size_tokens": usage.prompt_size_tokens,
+        }
 
     def _normalize_suggestions(self, suggestions: dict) -> dict:
         return {
@@ -0,0 +1,402 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+from functools import lru_cache
+from typing import Callable, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.database import AsyncSessionLocal
+from app.core.settings import get_settings
+from app.enums import JobPriority
+from app.models.job import Job, JobStatus
+from app.models.timestamp_mixin import SOFIA_TZ, sofia_now
+from app.services.agent.job_events import job_events, running_jobs
+from app.services.domain.job_service import process_agent_job
+
+logger = logging.getLogger(__name__)
+
+
+def _aware(moment):
+    # SQLite hands back the stored Sofia wall time without its offset
+    if moment.tzinfo is None:
+        return SOFIA_TZ.localize(moment)
+    return moment
+
+
+class JobQueue:
+    """
+    Durable queue on top of the jobs table.
+
+    A worker claims a PENDING job by atomically moving it to GENERATING with a
+    lease. The lease is renewed while the job runs; a GENERATING job whose lease
+    has expired (crashed worker, restart) becomes claimable again until it
+    runs out of attempts.
+
+    Claims use weighted fair queuing across users. Each user's next job is
+    tagged with the service the user recently got (jobs running or started
+    within fair_window_seconds, plus this one) divided by the weight of the
+    job's class, so users get turns in proportion to their class weights:
+    an interactive follow-up counts four times less against its user than a
+    bulk job. Every aging_seconds a job waits takes one job off its user's
+    service, so bulk work still runs under steady interactive load. The
+    lowest tag is claimed first.
+
+    A user with bulk_threshold or more jobs waiting has all of them weighted
+    as bulk, and a user already running user_max_concurrency jobs is skipped
+    until one finishes.
+
+    The first claim gives a job deadline_seconds to finish, kept across
+    retries. A job past its deadline is never claimed again; recover_stuck
+    fails it.
+    """
+
+    CLASS_WEIGHTS = {
+        JobPriority.INTERACTIVE: 4,
+        JobPriority.STANDARD: 2,
+        JobPriority.BULK: 1,
+    }
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        lease_seconds: int = 120,
+        max_attempts: int = 3,
+        user_max_concurrency: int = 2,
+        bulk_threshold: int = 5,
+        fair_window_seconds: int = 60,
+        aging_seconds: int = 60,
+        deadline_seconds: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.user_max_concurrency = user_max_concurrency
+        self.bulk_threshold = bulk_threshold
+        self.fair_window_seconds = fair_window_seconds
+        self.aging_seconds = aging_seconds
+        self.deadline_seconds = deadline_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def wakeup(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def notify(self) -> None:
+        """Wake in-process workers after a job has been committed."""
+        self.wakeup.set()
+
+    def _waiting(self, now):
+        """Jobs no worker holds: queued, or left behind by a lapsed lease."""
+        lease_expired = or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now)
+        return or_(
+            Job.status == JobStatus.PENDING,
+            and_(Job.status == JobStatus.GENERATING, lease_expired),
+        )
+
+    def _claimable(self, now):
+        return and_(
+            Job.attempts < self.max_attempts,
+            self._waiting(now),
+            or_(Job.deadline_at.is_(None), Job.deadline_at > now),
+        )
+
+    def _running(self, job, now):
+        """Jobs a live worker is processing."""
+        return and_(job.status == JobStatus.GENERATING, job.lease_expires_at >= now)
+
+    def _under_cap(self, now):
+        other = aliased(Job)
+        running = (
+            select(func.count(other.id))
+            .where(other.user_id == Job.user_id, self._running(other, now))
+            .scalar_subquery()
+        )
+        return running < self.user_max_concurrency
+
+    def _tag(self, job, served: int, now) -> float:
+        priority = job.priority
+        if job.queued >= self.bulk_threshold:
+            priority = JobPriority.BULK
+        waited = (now - _aware(job.created_at)).total_seconds()
+
+        return (served + 1) / self.CLASS_WEIGHTS[priority] - waited / self.aging_seconds
+
+    async def _candidates(self, db: AsyncSession, now) -> list:
+        """The next job of every user with work queued, best first."""
+        recent = now - timedelta(seconds=self.fair_window_seconds)
+        service = await db.execute(
+            select(
+                Job.user_id,
+                func.sum(case((self._running(Job, now), 1), else_=0)),
+                func.count(Job.id),
+            )
+            .where(or_(self._running(Job, now), Job.claimed_at >= recent))
+            .group_by(Job.user_id)
+        )
+        running, served = {}, {}
+        for user_id, running_jobs, served_jobs in service.all():
+            running[user_id], served[user_id] = running_jobs, served_jobs
+
+        rank = (
+            func.row_number()
+            .over(partition_by=Job.user_id, order_by=(Job.priority, Job.created_at))
+            .label("rank")
+        )
+        queued = func.count().over(partition_by=Job.user_id).label("queued")
+        heads = (
+            select(Job.id, Job.user_id, Job.priority, Job.created_at, rank, queued)
+            .where(self._claimable(now))
+            .subquery()
+        )
+        result = await db.execute(select(heads).where(heads.c.rank == 1))
+
+        candidates = [
+            job
+            for job in result.all()
+            if running.get(job.user_id, 0) < self.user_max_concurrency
+        ]
+        candidates.sort(
+            key=lambda job: (
+                self._tag(job, served.get(job.user_id, 0), now),
+                job.created_at,
+            )
+        )
+        return candidates[:10]
+
+    async def claim(self, worker_id: str) -> Optional[str]:
+        async with self._session_factory() as db:
+            now = sofia_now()
+            deadline = {}
+            if self.deadline_seconds:
+                deadline["deadline_at"] = func.coalesce(
+                    Job.deadline_at, now + timedelta(seconds=self.deadline_seconds)
+                )
+            for candidate in await self._candidates(db, now):
+                # Conditional update: only one worker can win the row, and
+                # the user's cap is checked again against concurrent claims
+                claimed = await db.execute(
+                    update(Job)
+                    .where(
+                        Job.id == candidate.id,
+                        self._claimable(now),
+                        self._under_cap(now),
+                    )
+                    .values(
+                        status=JobStatus.GENERATING,
+                        leased_by=worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        attempts=Job.attempts + 1,
+                        claimed_at=func.coalesce(Job.claimed_at, now),
+                        queue_wait_seconds=func.coalesce(
+                            Job.queue_wait_seconds,
+                            (now - _aware(candidate.created_at)).total_seconds(),
+                        ),
+                        **deadline,
+                    )
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return candidate.id
+
+        return None
+
+    async def renew(self, job_id: str, worker_id: str) -> bool:
+        async with self._session_factory() as db:
+            result = await db.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.leased_by == worker_id,
+                    Job.status == JobStatus.GENERATING,
+                )
+                .values(
+                    lease_expires_at=sofia_now()
+                    + timedelta(seconds=self.lease_seconds)
+                )
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        """Hand a job back to the queue when its worker shuts down mid-run."""
+        async with self._session_factory() as db:
+            await db.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.leased_by == worker_id,
+                    Job.status == JobStatus.GENERATING,
+                )
+                .values(
+                    status=JobStatus.PENDING,
+                    leased_by=None,
+                    lease_expires_at=None,
+                    attempts=Job.attempts - 1,
+                )
+            )
+            await db.commit()
+
+    async def recover_stuck(self) -> int:
+        """
+        Requeue GENERATING jobs whose lease has expired, and fail waiting jobs
+        that are past their deadline or have used up their attempts. Returns
+        the number of rows touched.
+        """
+        async with self._session_factory() as db:
+            now = sofia_now()
+            lease_expired = or_(
+                Job.lease_expires_at.is_(None), Job.lease_expires_at < now
+            )
+
+            expired = await db.execute(
+                update(Job)
+                .where(self._waiting(now), Job.deadline_at <= now)
+                .values(
+                    status=JobStatus.FAILED,
+                    leased_by=None,
+                    lease_expires_at=None,
+                    error_message="Job deadline exceeded",
+                )
+            )
+            failed = await db.execute(
+                update(Job)
+                .where(
+                    Job.status == JobStatus.GENERATING,
+                    Job.attempts >= self.max_attempts,
+                    lease_expired,
+                )
+                .values(
+                    status=JobStatus.FAILED,
+                    leased_by=None,
+                    lease_expires_at=None,
+                    error_message="Job abandoned after too many attempts",
+                )
+            )
+            requeued = await db.execute(
+                update(Job)
+                .where(Job.status == JobStatus.GENERATING, lease_expired)
+                .values(
+                    status=JobStatus.PENDING, leased_by=None, lease_expires_at=None
+                )
+            )
+            await db.commit()
+
+            return expired.rowcount + failed.rowcount + requeued.rowcount
+
+
+class JobWorkerPool:
+    """A fixed number of asyncio workers pulling jobs from a JobQueue."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+    ):
+        self._queue = queue
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def start(self) -> None:
+        recovered = await self._queue.recover_stuck()
+        if recovered:
+            logger.info("Recovered %d stuck jobs", recovered)
+
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self._worker_prefix}:{n}"))
+            for n in range(self._concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._reap()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, worker_id: str) -> None:
+        wakeup = self._queue.wakeup
+        while True:
+            wakeup.clear()
+            job_id = await self._queue.claim(worker_id)
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # The job runs in its own task so it can be cancelled without
+            # taking the worker down with it
+            job = asyncio.create_task(process_agent_job(job_id))
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id, job))
+            try:
+                with running_jobs.track(job_id, job):
+                    await asyncio.wait({job})
+                if job.cancelled():
+                    logger.info("Job %s cancelled on worker %s", job_id, worker_id)
+                elif job.exception() is not None:
+                    logger.error(
+                        "Worker %s crashed on job %s",
+                        worker_id,
+                        job_id,
+                        exc_info=job.exception(),
+                    )
+            except asyncio.CancelledError:
+                job.cancel()
+                await asyncio.gather(job, return_exceptions=True)
+                await self._queue.release(job_id, worker_id)
+                raise
+            finally:
+                heartbeat.cancel()
+                job_events.discard(job_id)
+
+    async def _heartbeat(self, job_id: str, worker_id: str, job: asyncio.Task) -> None:
+        interval = max(self._queue.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self._queue.renew(job_id, worker_id):
+                # Cancelled, deleted with its session, or taken over after
+                # the lease lapsed: either way this run's result is not wanted
+                job.cancel()
+                return
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(self._queue.lease_seconds)
+            try:
+                await self._queue.recover_stuck()
+            except Exception:
+                logger.exception("Failed to recover stuck jobs")
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    s = get_settings()
+    return JobQueue(
+        lease_seconds=s.job_lease_seconds,
+        max_attempts=s.job_max_attempts,
+        user_max_concurrency=s.job_user_max_concurrency,
+        bulk_threshold=s.job_bulk_threshold,
+        fair_window_seconds=s.job_fair_window_seconds,
+        aging_seconds=s.job_aging_seconds,
+        deadline_seconds=s.job_deadline_seconds,
+    )
+
+
+def create_worker_pool() -> JobWorkerPool:
+    s = get_settings()
+    return JobWorkerPool(
+        get_job_queue(),
+        concurrency=s.job_worker_concurrency,
+        poll_interval=s.job_poll_interval_seconds,
+    )
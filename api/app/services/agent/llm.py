@@ -1,22 +1,260 @@
+import asyncio
 import json
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Optional
 
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
 
 from app.core.settings import get_settings
+from app.services.agent.llm_cache import cache_key, get_llm_cache
+from app.services.agent.llm_retry import (
+    LatencyTracker,
+    LLMUnavailableError,
+    backoff_delay,
+    is_retryable,
+)
+from app.services.agent.llm_scheduler import estimate_tokens, get_llm_scheduler
+from app.services.agent.single_flight import Flight, SingleFlight
+from app.services.agent.usage import record_usage
 
 s = get_settings()
-_client = AsyncOpenAI(api_key=s.openai_api_key)
+# One pooled client for the whole process, sized to the scheduler's concurrency
+# Retries are handled here rather than by the SDK so they go through the scheduler
+_client = AsyncOpenAI(
+    api_key=s.openai_api_key,
+    base_url=s.openai_base_url or None,
+    timeout=s.openai_request_timeout_seconds,
+    max_retries=0,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=s.openai_max_concurrency * 2,
+            max_keepalive_connections=s.openai_max_concurrency,
+        )
+    ),
+)
 
+MODEL = s.openai_model or "gpt-4o-mini"
+TEMPERATURE = 0.2
 
-async def chat_json(system: str, user: str) -> dict:
-    resp = await _client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.2,
+# Identical prompts in flight at the same time share one upstream request
+llm_flights = SingleFlight()
+
+# Time until a request is usable (first chunk for streams), per mode
+_latencies = {True: LatencyTracker(), False: LatencyTracker()}
+
+
+def _build_messages(system: str, user: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+class _Attempt:
+    """
+    One scheduled upstream request. It is ready once the first content
+    arrives (the whole answer for non-streaming calls) and keeps its
+    scheduler slot until closed.
+    """
+
+    def __init__(self, request: dict, stream: bool):
+        self._request = request
+        self._stream = stream
+        prompt = [m["content"] for m in request["messages"]]
+        self._estimate = estimate_tokens(*prompt) + s.openai_completion_token_estimate
+        self._exit = AsyncExitStack()
+        self._ticket = None
+        self._contents: Optional[AsyncIterator[str]] = None
+        self.first = ""
+        self.usage = None
+
+    async def _read(self, chunks) -> AsyncIterator[str]:
+        async for chunk in chunks:
+            if chunk.usage:
+                self.usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def start(self) -> "_Attempt":
+        scheduler = get_llm_scheduler()
+        try:
+            self._ticket = await self._exit.enter_async_context(
+                scheduler.slot(self._estimate)
+            )
+            started = time.monotonic()
+            try:
+                if self._stream:
+                    raw = await _client.chat.completions.with_raw_response.create(
+                        **self._request,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                    scheduler.observe_headers(raw.headers)
+                    chunks = await raw.parse()
+                    self._exit.push_async_callback(chunks.close)
+                    self._contents = self._read(chunks)
+                    self.first = await anext(self._contents, "")
+                else:
+                    raw = await _client.chat.completions.with_raw_response.create(
+                        **self._request
+                    )
+                    scheduler.observe_headers(raw.headers)
+                    response = await raw.parse()
+                    self.usage = response.usage
+                    self.first = response.choices[0].message.content
+            except RateLimitError as e:
+                scheduler.observe_rate_limited(e.response.headers)
+                raise
+            _latencies[self._stream].record(time.monotonic() - started)
+        except BaseException:
+            await self.aclose()
+            raise
+
+        return self
+
+    async def rest(self) -> AsyncIterator[str]:
+        if self._contents is not None:
+            async for content in self._contents:
+                yield content
+
+    async def aclose(self) -> None:
+        if self._ticket is not None:
+            self._ticket.settle(self.usage.total_tokens if self.usage else None)
+            self._ticket = None
+        await self._exit.aclose()
+
+
+def _hedge_delay(stream: bool) -> Optional[float]:
+    if not s.openai_hedging_enabled:
+        return None
+    p95 = _latencies[stream].percentile(95)
+    if p95 is None:
+        return None
+    return max(p95, s.openai_hedge_min_delay_seconds)
+
+
+async def _start_hedged(request: dict, stream: bool) -> _Attempt:
+    """
+    Start a request and, if it is still not ready after the recent p95,
+    a duplicate. The first one to become ready wins; the other is cancelled.
+    """
+    pending = {asyncio.create_task(_Attempt(request, stream).start())}
+    winner: Optional[_Attempt] = None
+    error: Optional[BaseException] = None
+    try:
+        delay = _hedge_delay(stream)
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                pending.add(asyncio.create_task(_Attempt(request, stream).start()))
+
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    await task.result().aclose()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if winner is None:
+        raise error
+    return winner
+
+
+async def _complete(
+    flight: Flight, system: str, user: str, key: str, stream: bool
+) -> None:
+    request = dict(
+        model=MODEL,
+        temperature=TEMPERATURE,
         response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
+        messages=_build_messages(system, user),
     )
 
-    return json.loads(resp.choices[0].message.content)
+    started = time.monotonic()
+    # Only failures before the first chunk are retried; after that the
+    # deltas have already been forwarded to the callers
+    for retry in range(s.openai_max_retries + 1):
+        try:
+            attempt = await _start_hedged(request, stream)
+            break
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if retry == s.openai_max_retries:
+                raise LLMUnavailableError(
+                    f"Model unavailable after {retry + 1} attempts: {e}"
+                ) from e
+            await asyncio.sleep(
+                backoff_delay(
+                    retry, s.openai_retry_base_seconds, s.openai_retry_max_seconds
+                )
+            )
+
+    try:
+        if attempt.first:
+            flight.emit(attempt.first)
+        async for content in attempt.rest():
+            flight.emit(content)
+    finally:
+        await attempt.aclose()
+        record_usage(attempt.usage, time.monotonic() - started)
+
+    cache = get_llm_cache()
+    if cache:
+        content = "".join(flight.chunks)
+        try:
+            json.loads(content)
+        except ValueError:
+            return  # never cache a truncated completion
+        await cache.put(key, content)
+
+
+async def close_client() -> None:
+    await _client.close()
+
+
+async def chat_json(system: str, user: str, use_cache: bool = True) -> dict:
+    # A bypassed request skips the lookup but still refreshes the entry
+    cache = get_llm_cache()
+    key = cache_key(system, user, MODEL, TEMPERATURE)
+    if use_cache and cache and (cached := await cache.get(key)) is not None:
+        return json.loads(cached)
+
+    flight = llm_flights.join(
+        key, lambda f: _complete(f, system, user, key, stream=False)
+    )
+    try:
+        return json.loads(await flight.result())
+    finally:
+        llm_flights.leave(flight)
+
+
+async def chat_json_stream(
+    system: str, user: str, use_cache: bool = True
+) -> AsyncIterator[str]:
+    """Yield the raw JSON completion text as it arrives from the model."""
+    cache = get_llm_cache()
+    key = cache_key(system, user, MODEL, TEMPERATURE)
+    if use_cache and cache and (cached := await cache.get(key)) is not None:
+        yield cached
+        return
+
+    flight = llm_flights.join(
+        key, lambda f: _complete(f, system, user, key, stream=True)
+    )
+    try:
+        async for chunk in flight:
+            yield chunk
+    finally:
+        llm_flights.leave(flight)
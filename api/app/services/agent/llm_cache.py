@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from app.core.settings import get_settings
+
+
+def cache_key(system: str, user: str, model: str, temperature: float) -> str:
+    payload = json.dumps(
+        {"system": system, "user": user, "model": model, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of raw completion text.
+
+    Lookups go to a bounded in-memory LRU first and then to a SQLite file,
+    so identical prompts survive restarts and are shared by every process
+    that points at the same file. Both tiers expire entries after ttl_seconds
+    and evict the oldest entries once they are full. Disk access runs in a
+    thread so the event loop never blocks on it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        ttl_seconds: int = 7 * 24 * 3600,
+        memory_entries: int = 256,
+        disk_entries: int = 10_000,
+    ):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at"
+                " ON llm_cache (created_at)"
+            )
+        return self._conn
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            row = (
+                self._db()
+                .execute(
+                    "SELECT response, expires_at FROM llm_cache"
+                    " WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                )
+                .fetchone()
+            )
+        return row
+
+    def _disk_put(self, key: str, response: str, expires_at: float) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache"
+                " (key, response, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, response, time.time(), expires_at),
+            )
+            db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY created_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.disk_entries,),
+            )
+            db.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if time.time() < expires_at:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return response
+            del self._memory[key]
+
+        if self.path:
+            row = await asyncio.to_thread(self._disk_get, key)
+            if row is not None:
+                response, expires_at = row
+                self._remember(key, response, expires_at)
+                self.hits["disk"] += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: str) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, response, expires_at)
+        if self.path:
+            await asyncio.to_thread(self._disk_put, key, response, expires_at)
+
+    def stats(self) -> dict:
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "hits_memory": self.hits["memory"],
+            "hits_disk": self.hits["disk"],
+            "misses": self.misses,
+            "hit_ratio": (lookups - self.misses) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    s = get_settings()
+    if not s.llm_cache_enabled:
+        return None
+
+    return LLMResponseCache(
+        path=s.llm_cache_path or None,
+        ttl_seconds=s.llm_cache_ttl_seconds,
+        memory_entries=s.llm_cache_memory_entries,
+        disk_entries=s.llm_cache_disk_entries,
+    )
@@ -0,0 +1,39 @@
+import random
+from collections import deque
+from typing import Optional
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+# Connection errors include timeouts; 429s are paced by the scheduler first
+RETRYABLE_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+
+class LLMUnavailableError(RuntimeError):
+    """The model could not be reached after all retries."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, so retries do not arrive in lockstep."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class LatencyTracker:
+    """Recent request latencies, used to decide when a request is slow enough to hedge."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
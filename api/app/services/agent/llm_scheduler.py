@@ -0,0 +1,188 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Mapping, Optional
+
+from app.core.settings import get_settings
+
+# Rough chars-per-token ratio for English prompts; only used for admission
+CHARS_PER_TOKEN = 4
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(t) for t in texts) // CHARS_PER_TOKEN + 1
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit reset values such as "1s", "6m0s" or "250ms"."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return _parse_duration(
+        headers.get("x-ratelimit-reset-tokens")
+        or headers.get("x-ratelimit-reset-requests")
+    )
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously, as the provider accounts it."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(
+            self.capacity, self.level + (now - self._updated) * self.capacity / 60
+        )
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int]) -> None:
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+class LLMScheduler:
+    """
+    Admission control for model requests.
+
+    Callers are admitted strictly in arrival order: the head of the queue
+    waits for a concurrency slot and for enough request and token budget
+    before the next caller is considered, so a large request is never
+    starved by a stream of small ones. Budgets start from the configured
+    RPM/TPM and are corrected from the provider's x-ratelimit-* headers
+    after every response; a 429 pauses admission until its retry-after.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._admission = asyncio.Lock()  # FIFO, gives fair queueing
+        self._paused_until = 0.0
+        self.waiting = 0
+
+    async def _admit(self, estimated_tokens: int) -> None:
+        while True:
+            delay = max(
+                self._paused_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(estimated_tokens),
+            )
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        self.requests.take(1)
+        self.tokens.take(estimated_tokens)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator["LLMTicket"]:
+        self.waiting += 1
+        try:
+            async with self._admission:
+                await self._slots.acquire()
+                try:
+                    await self._admit(estimated_tokens)
+                except BaseException:
+                    self._slots.release()
+                    raise
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield LLMTicket(self, estimated_tokens)
+        finally:
+            self._slots.release()
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        self.requests.sync(
+            _parse_int(headers.get("x-ratelimit-limit-requests")),
+            _parse_int(headers.get("x-ratelimit-remaining-requests")),
+        )
+        self.tokens.sync(
+            _parse_int(headers.get("x-ratelimit-limit-tokens")),
+            _parse_int(headers.get("x-ratelimit-remaining-tokens")),
+        )
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe_rate_limited(self, headers: Mapping[str, str]) -> None:
+        self.observe_headers(headers)
+        retry_after = _retry_after(headers)
+        self.pause(retry_after if retry_after is not None else 1.0)
+
+    def stats(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "rpm_capacity": self.requests.capacity,
+            "tpm_capacity": self.tokens.capacity,
+            "tpm_available": round(self.tokens.level),
+        }
+
+
+class LLMTicket:
+    def __init__(self, scheduler: LLMScheduler, estimated_tokens: int):
+        self._scheduler = scheduler
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Return the unused part of the estimate (or charge the overrun)."""
+        if actual_tokens is None:
+            return
+        self._scheduler.tokens.give_back(self.estimated_tokens - actual_tokens)
+
+
+@lru_cache(maxsize=1)
+def get_llm_scheduler() -> LLMScheduler:
+    s = get_settings()
+    return LLMScheduler(
+        rpm=s.openai_rpm_limit,
+        tpm=s.openai_tpm_limit,
+        max_concurrency=s.openai_max_concurrency,
+    )
@@ -0,0 +1,191 @@
+import json
+from typing import Any, List, Tuple
+
+# Parser states
+_BEFORE_OBJECT = "before_object"
+_EXPECT_KEY = "expect_key"
+_IN_KEY = "in_key"
+_EXPECT_COLON = "expect_colon"
+_EXPECT_VALUE = "expect_value"
+_IN_STRING = "in_string"
+_IN_RAW = "in_raw"
+_DONE = "done"
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class PartialJSONParser:
+    """
+    Incrementally parse the top-level fields of a streamed JSON object.
+
+    feed() returns a list of events:
+      ("delta", key, text)  - more characters of a string value
+      ("field", key, value) - a value has been fully parsed
+    """
+
+    def __init__(self):
+        self._state = _BEFORE_OBJECT
+        self._key = ""
+        self._key_escape = False
+        self._escape = ""
+        self._high_surrogate = ""
+        self._raw = ""
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+        self._value: List[str] = []
+        self.fields: dict[str, Any] = {}
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        events: List[Tuple[str, str, Any]] = []
+        delta: List[str] = []
+
+        for ch in chunk:
+            state = self._state
+
+            if state == _BEFORE_OBJECT:
+                if ch == "{":
+                    self._state = _EXPECT_KEY
+
+            elif state == _EXPECT_KEY:
+                if ch == '"':
+                    self._key = ""
+                    self._state = _IN_KEY
+                elif ch == "}":
+                    self._state = _DONE
+
+            elif state == _IN_KEY:
+                if self._key_escape:
+                    self._key += ch
+                    self._key_escape = False
+                elif ch == "\\":
+                    self._key_escape = True
+                elif ch == '"':
+                    self._state = _EXPECT_COLON
+                else:
+                    self._key += ch
+
+            elif state == _EXPECT_COLON:
+                if ch == ":":
+                    self._state = _EXPECT_VALUE
+
+            elif state == _EXPECT_VALUE:
+                if ch.isspace():
+                    continue
+                if ch == '"':
+                    self._value = []
+                    self._state = _IN_STRING
+                else:
+                    self._raw = ""
+                    self._raw_depth = 0
+                    self._raw_in_string = False
+                    self._raw_escape = False
+                    self._state = _IN_RAW
+                    self._feed_raw(ch, events)
+
+            elif state == _IN_STRING:
+                if self._escape:
+                    self._escape += ch
+                    decoded = self._decode_escape()
+                    if decoded is not None:
+                        self._append(decoded, delta)
+                elif ch == "\\":
+                    self._escape = ch
+                elif ch == '"':
+                    if self._high_surrogate:
+                        self._append("", delta)
+                    if delta:
+                        events.append(("delta", self._key, "".join(delta)))
+                        delta = []
+                    value = "".join(self._value)
+                    self.fields[self._key] = value
+                    events.append(("field", self._key, value))
+                    self._state = _EXPECT_KEY
+                else:
+                    self._append(ch, delta)
+
+            elif state == _IN_RAW:
+                self._feed_raw(ch, events)
+
+        if delta and self._state == _IN_STRING:
+            events.append(("delta", self._key, "".join(delta)))
+
+        return events
+
+    def _decode_escape(self) -> str | None:
+        esc = self._escape
+        if len(esc) < 2:
+            return None
+
+        if esc[1] == "u":
+            if len(esc) < 6:
+                return None
+            self._escape = ""
+            try:
+                return chr(int(esc[2:6], 16))
+            except ValueError:
+                return esc
+
+        self._escape = ""
+        return _SIMPLE_ESCAPES.get(esc[1], esc[1])
+
+    def _append(self, text: str, delta: List[str]) -> None:
+        if self._high_surrogate:
+            high, self._high_surrogate = self._high_surrogate, ""
+            if len(text) == 1 and 0xDC00 <= ord(text) <= 0xDFFF:
+                text = (high + text).encode("utf-16-le", "surrogatepass").decode(
+                    "utf-16-le"
+                )
+            else:
+                text = high + text
+        elif len(text) == 1 and 0xD800 <= ord(text) <= 0xDBFF:
+            self._high_surrogate = text
+            return
+
+        delta.append(text)
+        self._value.append(text)
+
+    def _feed_raw(self, ch: str, events: List[Tuple[str, str, Any]]) -> None:
+        if self._raw_in_string:
+            self._raw += ch
+            if self._raw_escape:
+                self._raw_escape = False
+            elif ch == "\\":
+                self._raw_escape = True
+            elif ch == '"':
+                self._raw_in_string = False
+            return
+
+        if ch in ",}" and self._raw_depth == 0:
+            self._finish_raw(events)
+            self._state = _DONE if ch == "}" else _EXPECT_KEY
+            return
+
+        self._raw += ch
+        if ch == '"':
+            self._raw_in_string = True
+        elif ch in "[{":
+            self._raw_depth += 1
+        elif ch in "]}":
+            self._raw_depth -= 1
+
+    def _finish_raw(self, events: List[Tuple[str, str, Any]]) -> None:
+        try:
+            value = json.loads(self._raw.strip())
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
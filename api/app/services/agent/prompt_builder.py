@@ -1,7 +1,72 @@
+import re
 from typing import Dict, Any
 
+from app.services.agent.llm_scheduler import CHARS_PER_TOKEN, estimate_tokens
+
+TRUNCATION_MARK = " […]"
+CONDENSED_NOTE = "(condensed: first sentence of each paragraph)"
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to the token budget at a word boundary."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[: max(max_chars - len(TRUNCATION_MARK), 0)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + TRUNCATION_MARK
+
+
+def _condense(text: str, max_tokens: int) -> str:
+    """
+    Fit a long draft into the budget by keeping the first sentence of every
+    paragraph (headings and topic sentences carry the structure), then
+    truncating if that is still too long.
+    """
+    if len(text) <= max_tokens * CHARS_PER_TOKEN:
+        return text
+
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    leads = [_SENTENCE_END.split(p, 1)[0] for p in paragraphs]
+    condensed = "\n\n".join(leads + [CONDENSED_NOTE])
+
+    return _truncate(condensed, max_tokens)
+
+
+def _summarize(text: str, max_tokens: int) -> str:
+    """Lead sentences of the first paragraphs, within the token budget."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    leads = " ".join(_SENTENCE_END.split(p, 1)[0] for p in paragraphs)
+    return _truncate(leads, max_tokens)
+
 
 class SEOPromptBuilder:
+    """
+    Builds the user prompt within a token budget.
+
+    Sections are kept by priority: the session title, constraints and the
+    current instruction always go in (the instruction capped on its own);
+    then the short draft fields; then the original request; and the previous
+    page_content gets whatever budget is left, condensed when it does not
+    fit. Truncation is deterministic so identical sessions still produce
+    identical prompts.
+    """
+
+    INSTRUCTIONS_MAX_TOKENS = 1000
+    ANCHOR_MAX_TOKENS = 600
+    DRAFT_FIELD_MAX_TOKENS = 150
+    # Below this a condensed page_content is not worth sending
+    MIN_CONTENT_TOKENS = 50
+    # Field regeneration only sends a short summary of the page
+    SUMMARY_MAX_TOKENS = 120
+    SUMMARY_KEYWORDS = 5
+
+    def __init__(self, token_budget: int = 3000):
+        self.token_budget = token_budget
+
     def build_user_payload(self, state: Dict[str, Any]) -> str:
         """
         Build prompt from state context.
@@ -12,7 +77,7 @@ class SEOPromptBuilder:
           current_draft: dict | None (previous agent suggestions)
           constraints: dict | None (SEO constraints)
         """
-        parts = [
+        header = [
             f'Session Title: "{state.get("session_title", "")}"',
         ]
 
@@ -31,26 +96,110 @@ class SEOPromptBuilder:
                     f"Meta description: {constraints['meta_description_min']}-{constraints['meta_description_max']} chars"
                 )
             if constraint_text:
-                parts.append("Constraints: " + ", ".join(constraint_text))
+                header.append("Constraints: " + ", ".join(constraint_text))
+
+        instruction = ""
+        instr = (state.get("instructions") or "").strip()
+        if instr:
+            instr = _truncate(instr, self.INSTRUCTIONS_MAX_TOKENS)
+            instruction = f'Current User Instruction: """{instr}"""'
+
+        current_draft = state.get("current_draft") or {}
+        draft_lines = {}
+        for key, value in current_draft.items():
+            if not value or key == "page_content":
+                continue
+            if key == "meta_keywords" and isinstance(value, list):
+                value = ", ".join(value)
+            draft_lines[key] = (
+                f"{key}: {_truncate(str(value), self.DRAFT_FIELD_MAX_TOKENS)}"
+            )
+
+        remaining = self.token_budget - estimate_tokens(
+            *header, *draft_lines.values(), instruction, "Return JSON only."
+        )
+
+        anchor = (state.get("anchor") or "").strip()
+        if anchor and remaining > 0:
+            anchor = _truncate(anchor, min(self.ANCHOR_MAX_TOKENS, remaining))
+            remaining -= estimate_tokens(anchor)
+        else:
+            anchor = ""
+
+        page_content = current_draft.get("page_content")
+        if page_content:
+            if remaining >= self.MIN_CONTENT_TOKENS:
+                draft_lines["page_content"] = (
+                    f"page_content: {_condense(page_content, remaining)}"
+                )
+            else:
+                draft_lines["page_content"] = (
+                    f"page_content: (omitted, {len(page_content)} chars)"
+                )
+
+        parts = list(header)
+        if anchor:
+            parts.append(f'Original Request: """{anchor}"""')
+
+        # Keep the draft fields in the order the model returned them
+        ordered = [draft_lines[k] for k in current_draft if k in draft_lines]
+        if ordered:
+            parts.append("Current Draft:\n" + "\n".join(ordered))
+
+        if instruction:
+            parts.append(instruction)
+
+        parts.append("Return JSON only.")
+        return "\n".join(parts)
+
+    def build_regenerate_payload(self, state: Dict[str, Any]) -> str:
+        """
+        Prompt for regenerating `regenerate_fields`: their current values and
+        a short summary of the page, rather than the whole draft. The page
+        content is only sent (condensed) when it is itself being regenerated.
+        """
+        fields = state["regenerate_fields"]
+        draft = state.get("current_draft") or {}
+        parts = [f'Session Title: "{state.get("session_title", "")}"']
 
         anchor = (state.get("anchor") or "").strip()
         if anchor:
+            anchor = _truncate(anchor, self.SUMMARY_MAX_TOKENS)
             parts.append(f'Original Request: """{anchor}"""')
 
-        current_draft = state.get("current_draft")
-        if current_draft:
-            draft_parts = []
-            for key, value in current_draft.items():
-                if value:
-                    if key == "meta_keywords" and isinstance(value, list):
-                        draft_parts.append(f"{key}: {', '.join(value)}")
-                    else:
-                        draft_parts.append(f"{key}: {value}")
-            if draft_parts:
-                parts.append("Current Draft:\n" + "\n".join(draft_parts))
+        summary = []
+        if draft.get("page_title") and "page_title" not in fields:
+            summary.append(f"Page title: {draft['page_title']}")
+        if draft.get("meta_keywords") and "meta_keywords" not in fields:
+            keywords = draft["meta_keywords"][: self.SUMMARY_KEYWORDS]
+            summary.append(f"Keywords: {', '.join(keywords)}")
+        page_content = draft.get("page_content")
+        if page_content and "page_content" in fields:
+            budget = self.token_budget - estimate_tokens(*parts, *summary)
+            summary.append(f"Page content: {_condense(page_content, budget)}")
+        elif page_content:
+            summary.append(
+                f"Page summary: {_summarize(page_content, self.SUMMARY_MAX_TOKENS)}"
+            )
+        if summary:
+            parts.append("Page:\n" + "\n".join(summary))
+
+        current = []
+        for field in fields:
+            value = draft.get(field)
+            if not value or field == "page_content":
+                continue
+            if isinstance(value, list):
+                value = ", ".join(value)
+            current.append(
+                f"{field}: {_truncate(str(value), self.DRAFT_FIELD_MAX_TOKENS)}"
+            )
+        if current:
+            parts.append("Current Values:\n" + "\n".join(current))
 
         instr = (state.get("instructions") or "").strip()
         if instr:
+            instr = _truncate(instr, self.INSTRUCTIONS_MAX_TOKENS)
             parts.append(f'Current User Instruction: """{instr}"""')
 
         parts.append("Return JSON only.")
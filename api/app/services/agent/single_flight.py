@@ -0,0 +1,113 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+
+class Flight:
+    """
+    One upstream call whose output chunks are replayed to every caller that
+    joined it, so streaming followers see the same deltas as the leader.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self._changed = asyncio.Event()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def emit(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            if i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+                continue
+
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+            await self._changed.wait()
+
+    async def result(self) -> str:
+        return "".join([chunk async for chunk in self])
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one upstream call.
+
+    The upstream call runs in its own task, so a caller that goes away does
+    not cancel the work for the others still waiting on it. Every join() must
+    be paired with a leave(); once the last caller has left an unfinished
+    call, it is cancelled.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def join(self, key: str, produce: Callable[[Flight], Awaitable[None]]) -> Flight:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            flight.waiters += 1
+            return flight
+
+        flight = Flight(key)
+        flight.waiters = 1
+        self._flights[key] = flight
+        self.started += 1
+
+        async def run() -> None:
+            try:
+                await produce(flight)
+            except BaseException as e:
+                flight.finish(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            else:
+                flight.finish()
+            finally:
+                self._forget(flight)
+
+        flight.task = asyncio.create_task(run())
+        return flight
+
+    def leave(self, flight: Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.done:
+            # Nobody will read the result; new callers start a fresh call
+            self._forget(flight)
+            flight.task.cancel()
+            self.abandoned += 1
+
+    def _forget(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+@dataclass
+class LLMUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+    # Estimated size of the last prompt built, whether or not it was sent
+    prompt_size_tokens: Optional[int] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+_current_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[LLMUsage]:
+    """
+    Collect usage of every model call made inside the block, including calls
+    made from tasks started inside it (they inherit the context). Cache hits
+    and calls coalesced onto another caller's request cost nothing and are
+    not counted.
+    """
+    usage = LLMUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(usage, latency_seconds: float) -> None:
+    """Add one upstream call; usage is the OpenAI usage object (may be None)."""
+    current = _current_usage.get()
+    if current is None:
+        return
+
+    current.calls += 1
+    current.latency_seconds += latency_seconds
+    if usage is not None:
+        current.prompt_tokens += usage.prompt_tokens or 0
+        current.completion_tokens += usage.completion_tokens or 0
+
+
+def record_prompt_size(tokens: int) -> None:
+    current = _current_usage.get()
+    if current is not None:
+        current.prompt_size_tokens = tokens
@@ -1,17 +1,18 @@
 from typing import Optional
 
-from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
 from app.models.job import Job
 from app.services.agent.job_pipeline import JobPipeline
 
 
 async def process_agent_job(job_id: str) -> None:
-    with next(get_db()) as db_session:
+    async with AsyncSessionLocal() as db_session:
         pipeline = JobPipeline()
         await pipeline.process(job_id, db_session)
 
 
-def get_job_with_messages(db: OrmSession, job_id: str) -> Optional[Job]:
-    return db.query(Job).filter(Job.id == job_id).first()
+async def get_job_with_messages(db: AsyncSession, job_id: str) -> Optional[Job]:
+    return await db.scalar(select(Job).where(Job.id == job_id))
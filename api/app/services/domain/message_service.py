@@ -1,8 +1,30 @@
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 from app.models.message import Message
-from app.repositories.message import MessageRepository
+from app.repositories.message import MessageRepository, AsyncMessageRepository
 from app.schemas.message import MessageOut
+from app.schemas.pagination import Page, decode_cursor, encode_cursor
+
+
+def _decode_message_cursors(
+    after: Optional[str], before: Optional[str]
+) -> tuple[Optional[tuple[datetime, str]], Optional[tuple[datetime, str]]]:
+    """Raises ValueError for a malformed cursor or when both are given."""
+    if after is not None and before is not None:
+        raise ValueError("Pass either after or before, not both")
+
+    def decode(cursor: Optional[str]) -> Optional[tuple[datetime, str]]:
+        if cursor is None:
+            return None
+        created_at, message_id = decode_cursor(cursor, 2)
+        return datetime.fromisoformat(str(created_at)), str(message_id)
+
+    return decode(after), decode(before)
+
+
+def _message_cursor(message: Message) -> str:
+    return encode_cursor(message.created_at.isoformat(), message.id)
 
 
 class MessageTransformer:
@@ -29,6 +51,47 @@ class MessageTransformer:
             "meta_keywords": list(suggestions.get("meta_keywords") or []),
         }
 
+    def extract_suggestions(self, message: Message) -> Dict[str, Any]:
+        suggestions = {}
+
+        field_mapping = {
+            "suggested_page_title": "page_title",
+            "suggested_page_content": "page_content",
+            "suggested_title_tag": "title_tag",
+            "suggested_meta_description": "meta_description",
+            "suggested_meta_keywords": "meta_keywords",
+        }
+
+        for db_field, context_field in field_mapping.items():
+            value = getattr(message, db_field, None)
+            if value is not None:
+                suggestions[context_field] = value
+
+        return suggestions
+
+    def to_message_page(
+        self, messages: List[Message], limit: int, backwards: bool
+    ) -> Page[MessageOut]:
+        """
+        messages holds one row more than limit when there is another page;
+        for a backwards page (`before`, or no cursor at all) that extra row
+        is the oldest, at the front. next_cursor continues in the same
+        direction, so a first page's cursor is passed back as `before`.
+        """
+        next_cursor = None
+        if len(messages) > limit:
+            if backwards:
+                messages = messages[1:]
+                next_cursor = _message_cursor(messages[0])
+            else:
+                messages = messages[:limit]
+                next_cursor = _message_cursor(messages[-1])
+
+        return Page[MessageOut](
+            items=[self.to_message_out(msg) for msg in messages],
+            next_cursor=next_cursor,
+        )
+
 
 class MessageService:
     def __init__(
@@ -55,11 +118,23 @@ class MessageService:
         return self._transformer.to_message_out(message)
 
     def get_session_messages(
-        self, session_id: str, limit: int = 100, offset: int = 0
-    ) -> List[MessageOut]:
-        messages = self._message_repo.get_session_messages(session_id, limit, offset)
+        self,
+        session_id: str,
+        limit: int = 100,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Page[MessageOut]:
+        after_key, before_key = _decode_message_cursors(after, before)
+        messages = self._message_repo.get_session_messages(
+            session_id, limit + 1, after_key, before_key
+        )
+
+        return self._transformer.to_message_page(
+            messages, limit, backwards=after_key is None
+        )
 
-        return [self._transformer.to_message_out(msg) for msg in messages]
+    def delete_message(self, message: Message) -> None:
+        self._message_repo.delete_message(message)
 
     def get_first_message(self, session_id: str) -> Optional[Message]:
         return self._message_repo.get_first_message_of_session(session_id)
@@ -68,19 +143,60 @@ class MessageService:
         return self._message_repo.get_last_agent_message(session_id)
 
     def extract_suggestions(self, message: Message) -> Dict[str, Any]:
-        suggestions = {}
+        return self._transformer.extract_suggestions(message)
 
-        field_mapping = {
-            "suggested_page_title": "page_title",
-            "suggested_page_content": "page_content",
-            "suggested_title_tag": "title_tag",
-            "suggested_meta_description": "meta_description",
-            "suggested_meta_keywords": "meta_keywords",
-        }
 
-        for db_field, context_field in field_mapping.items():
-            value = getattr(message, db_field, None)
-            if value is not None:
-                suggestions[context_field] = value
+class AsyncMessageService:
+    def __init__(
+        self,
+        message_repo: AsyncMessageRepository,
+        transformer: MessageTransformer,
+    ):
+        self._message_repo = message_repo
+        self._transformer = transformer
 
-        return suggestions
+    async def create_user_message(self, session_id: str, content: str) -> Message:
+        return await self._message_repo.create_user_message(session_id, content)
+
+    async def create_agent_message(
+        self, session_id: str, raw_suggestions: dict
+    ) -> MessageOut:
+        normalized_suggestions = self._transformer.normalize_suggestions(
+            raw_suggestions
+        )
+        message = await self._message_repo.create_agent_message(
+            session_id, normalized_suggestions
+        )
+
+        return self._transformer.to_message_out(message)
+
+    async def get_session_messages(
+        self,
+        session_id: str,
+        limit: int = 100,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Page[MessageOut]:
+        after_key, before_key = _decode_message_cursors(after, before)
+        messages = await self._message_repo.get_session_messages(
+            session_id, limit + 1, after_key, before_key
+        )
+
+        return self._transformer.to_message_page(
+            messages, limit, backwards=after_key is None
+        )
+
+    async def delete_message(self, message: Message) -> None:
+        await self._message_repo.delete_message(message)
+
+    async def get_first_message(self, session_id: str) -> Optional[Message]:
+        return await self._message_repo.get_first_message_of_session(session_id)
+
+    async def get_last_agent_message(self, session_id: str) -> Optional[Message]:
+        return await self._message_repo.get_last_agent_message(session_id)
+
+    async def get_message(self, session_id: str, message_id: str) -> Optional[Message]:
+        return await self._message_repo.get_message(session_id, message_id)
+
+    def extract_suggestions(self, message: Message) -> Dict[str, Any]:
+        return self._transformer.extract_suggestions(message)
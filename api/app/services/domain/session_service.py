@@ -1,12 +1,47 @@
+from datetime import datetime
 from typing import List, Optional
 
 from app.models.session import Session as SessionModel
-from app.repositories.session import SessionRepository
+from app.repositories.session import SessionRepository, AsyncSessionRepository
+from app.schemas.pagination import Page, decode_cursor, encode_cursor
 from app.schemas.session import (
     SessionListResponse,
     SessionUpdateRequest,
     SessionUpdateResponse,
 )
+from app.services.agent.job_events import announce_cancelled
+
+
+def _decode_session_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, str]]:
+    """Raises ValueError for a malformed cursor."""
+    if cursor is None:
+        return None
+    last_message_at, session_id = decode_cursor(cursor, 2)
+    return datetime.fromisoformat(str(last_message_at)), str(session_id)
+
+
+def _to_session_page(
+    sessions: List[SessionModel], limit: int
+) -> Page[SessionListResponse]:
+    # One extra row was fetched to tell whether another page exists
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        next_cursor = encode_cursor(last.last_message_at.isoformat(), last.id)
+
+    items = [
+        SessionListResponse(
+            id=session.id,
+            title=session.title,
+            created_at=session.created_at.isoformat(),
+            updated_at=session.updated_at.isoformat(),
+            last_message_at=(session.last_message_at or session.created_at).isoformat(),
+        )
+        for session in sessions
+    ]
+
+    return Page[SessionListResponse](items=items, next_cursor=next_cursor)
 
 
 class AutoTitleGenerator:
@@ -39,24 +74,13 @@ class SessionService:
         return self._session_repo.get_session_by_id(session_id, user_id)
 
     def get_user_sessions(
-        self, user_id: str, limit: int = 50, offset: int = 0
-    ) -> List[SessionListResponse]:
-        sessions_data = self._session_repo.get_user_sessions(user_id, limit, offset)
-
-        return [
-            SessionListResponse(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat(),
-                last_message_at=(
-                    last_message_at.isoformat()
-                    if last_message_at
-                    else session.created_at.isoformat()
-                ),
-            )
-            for session, last_message_at in sessions_data
-        ]
+        self, user_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Page[SessionListResponse]:
+        sessions = self._session_repo.get_user_sessions(
+            user_id, limit + 1, _decode_session_cursor(cursor)
+        )
+
+        return _to_session_page(sessions, limit)
 
     def update_session(
         self, session_id: str, user_id: str, update_data: SessionUpdateRequest
@@ -94,3 +118,64 @@ class SessionService:
 
         self._session_repo.delete_session(session)
         return True
+
+
+class AsyncSessionService:
+    def __init__(
+        self,
+        session_repo: AsyncSessionRepository,
+        title_generator: AutoTitleGenerator,
+    ):
+        self._session_repo = session_repo
+        self._title_generator = title_generator
+
+    async def create_session(
+        self, user_id: str, title: Optional[str], first_message: str
+    ) -> SessionModel:
+        session_title = title or self._title_generator.generate_title(first_message)
+
+        return await self._session_repo.create_session(user_id, session_title)
+
+    async def get_session(
+        self, session_id: str, user_id: str
+    ) -> Optional[SessionModel]:
+        return await self._session_repo.get_session_by_id(session_id, user_id)
+
+    async def get_user_sessions(
+        self, user_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Page[SessionListResponse]:
+        sessions = await self._session_repo.get_user_sessions(
+            user_id, limit + 1, _decode_session_cursor(cursor)
+        )
+
+        return _to_session_page(sessions, limit)
+
+    async def update_session(
+        self, session_id: str, user_id: str, update_data: SessionUpdateRequest
+    ) -> Optional[SessionUpdateResponse]:
+        session = await self.get_session(session_id, user_id)
+        if not session:
+            return None
+
+        if update_data.title is not None:
+            session = await self._session_repo.update_session(
+                session, title=update_data.title
+            )
+
+        return SessionUpdateResponse(
+            id=session.id,
+            title=session.title,
+            updated_at=session.updated_at.isoformat(),
+        )
+
+    async def delete_session(self, session_id: str, user_id: str) -> bool:
+        session = await self.get_session(session_id, user_id)
+
+        if not session:
+            return False
+
+        deleted_job_ids = await self._session_repo.delete_session(session)
+        # Stop generating answers for a session that no longer exists
+        for job_id in deleted_job_ids:
+            announce_cancelled(job_id, "Session deleted")
+        return True
@@ -1,7 +1,61 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
 from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as OrmSession
 
 from app.models.user import User
+from app.models.timestamp_mixin import sofia_now
+
+
+class UserIdCache:
+    """
+    Bounded TTL/LRU of identity key (sub, or email when there is no sub) ->
+    user id, shared by all requests in the process.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl_seconds: int = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        user_id, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return user_id
+
+    def put(self, key: str, user_id: str) -> None:
+        self._entries[key] = (user_id, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+user_id_cache = UserIdCache()
+
+
+def _identity(claims: dict) -> tuple[str, str, str, str]:
+    sub = claims.get("sub")
+    email = claims.get("email")
+    name = claims.get("name") or claims.get("nickname")
+
+    if not sub and not email:
+        raise HTTPException(status_code=401, detail="Invalid token (no sub/email)")
+
+    return (f"sub:{sub}" if sub else f"email:{email}"), sub, email, name
 
 
 class UserService:
@@ -40,3 +94,64 @@ class UserService:
         self.db.flush()
 
         return user
+
+
+class AsyncUserService:
+    def __init__(self, db: AsyncSession, cache: UserIdCache = user_id_cache):
+        self.db = db
+        self._cache = cache
+
+    async def ensure_user_id(self, claims: dict) -> str:
+        """Resolve the caller's user id, hitting the database only on a cache miss."""
+        key, _, _, _ = _identity(claims)
+
+        user_id = self._cache.get(key)
+        if user_id:
+            return user_id
+
+        return (await self.ensure_user(claims)).id
+
+    async def ensure_user(self, claims: dict) -> User:
+        key, sub, email, name = _identity(claims)
+
+        user = await self._find_existing_user(sub, email)
+
+        if not user:
+            user = await self._upsert_user(sub, email, name)
+
+        self._cache.put(key, user.id)
+        return user
+
+    async def _find_existing_user(self, sub: str, email: str) -> User:
+        user = None
+
+        if sub:
+            result = await self.db.execute(select(User).where(User.auth_sub == sub))
+            user = result.scalar_one_or_none()
+
+        if not user and email:
+            result = await self.db.execute(select(User).where(User.email == email))
+            user = result.scalar_one_or_none()
+
+        return user
+
+    async def _upsert_user(self, sub: str, email: str, name: str) -> User:
+        now = sofia_now()
+        # A concurrent first request may insert the same sub/email; let the
+        # unique constraint pick the winner and read back whichever row exists
+        await self.db.execute(
+            insert(User)
+            .values(
+                id=str(uuid.uuid4()),
+                auth_sub=sub,
+                email=email,
+                display_name=name,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing()
+        )
+        # Commit now so a cached id always refers to a persisted row
+        await self.db.commit()
+
+        return await self._find_existing_user(sub, email)
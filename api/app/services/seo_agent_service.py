@@ -1,7 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 
+from app.core.settings import get_settings
 from app.services.agent.agent_graph import seo_graph
-from app.services.domain.message_service import MessageService
+from app.services.domain.message_service import AsyncMessageService
+
+EventCallback = Callable[[dict], None]
 
 
 class SEOAgentService:
@@ -11,35 +14,60 @@ class SEOAgentService:
         "meta_description_max": 160,
     }
 
-    def __init__(self, message_service: MessageService):
+    def __init__(self, message_service: AsyncMessageService):
         self._message_service = message_service
 
     async def process_first_message_new_session(
-        self, session_title: str, user_message: str
+        self,
+        session_title: str,
+        user_message: str,
+        on_event: Optional[EventCallback] = None,
+        bypass_cache: bool = False,
     ) -> Dict[str, Any]:
         context = {
             "session_title": session_title,
             "instructions": user_message,
             "constraints": self.DEFAULT_CONSTRAINTS,
+            "bypass_cache": bypass_cache,
         }
 
-        result = await seo_graph.ainvoke(context)
-
-        return result.get("suggestions", {})
+        return await self.run(context, on_event)
 
     async def process_message_to_existing_session(
         self,
         session_id: str,
         session_title: str,
         user_message: str,
+        on_event: Optional[EventCallback] = None,
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        context = await self.load_followup_context(
+            session_id, session_title, user_message, bypass_cache
+        )
+
+        return await self.run(context, on_event)
+
+    async def load_followup_context(
+        self,
+        session_id: str,
+        session_title: str,
+        user_message: str,
+        bypass_cache: bool = False,
     ) -> Dict[str, Any]:
-        first_user_message = self._message_service.get_first_message(session_id)
-        last_agent_message = self._message_service.get_last_agent_message(session_id)
+        """
+        Read everything a follow-up needs from the database up front, so the
+        caller can end its transaction before the model call.
+        """
+        first_user_message = await self._message_service.get_first_message(session_id)
+        last_agent_message = await self._message_service.get_last_agent_message(
+            session_id
+        )
 
         context = {
             "session_title": session_title,
             "instructions": user_message,
             "constraints": self.DEFAULT_CONSTRAINTS,
+            "bypass_cache": bypass_cache,
         }
 
         if first_user_message and first_user_message.message_content:
@@ -49,6 +77,57 @@ class SEOAgentService:
             context["current_draft"] = self._message_service.extract_suggestions(
                 last_agent_message
             )
+            # Let the model return only the fields it changes
+            context["patch_mode"] = get_settings().followup_patch_mode
+
+        return context
+
+    async def regenerate_fields(
+        self,
+        session_title: str,
+        draft: Dict[str, Any],
+        fields: List[str],
+        instructions: Optional[str] = None,
+        anchor: Optional[str] = None,
+        on_event: Optional[EventCallback] = None,
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Regenerate only `fields` of `draft`; the other fields are kept as they are."""
+        request = f"Regenerate only these fields: {', '.join(fields)}."
+        if instructions:
+            request += f" {instructions}"
+
+        context = {
+            "session_title": session_title,
+            "instructions": request,
+            "constraints": self.DEFAULT_CONSTRAINTS,
+            "current_draft": draft,
+            "regenerate_fields": fields,
+            "bypass_cache": bypass_cache,
+        }
+        if anchor:
+            context["anchor"] = anchor
+
+        return await self.run(context, on_event)
+
+    async def run(
+        self, context: dict, on_event: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        if on_event is None:
+            result = await seo_graph.ainvoke(context)
+            return result.get("suggestions", {})
+
+        # Streaming mode: forward partial fields emitted by the suggest node
+        result: dict = {}
+        async for mode, chunk in seo_graph.astream(
+            {**context, "stream": True}, stream_mode=["custom", "values"]
+        ):
+            if mode == "custom":
+                on_event(chunk)
+            else:
+                result = chunk
+
+        suggestions = result.get("suggestions", {})
+        on_event({"event": "suggestion", "suggestion": suggestions})
 
-        result = await seo_graph.ainvoke(context)
-        return result.get("suggestions", {})
+        return suggestions
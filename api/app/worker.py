@@ -0,0 +1,37 @@
+"""
+Standalone job worker.
+
+Run with `python -m app.worker` alongside an API started with
+JOB_WORKER_MODE=external to scale job processing separately from web processes.
+"""
+
+import asyncio
+import logging
+import signal
+
+import app.models  # noqa: F401  (registers ORM classes)
+from app.core.database import dispose_engines, init_db
+from app.services.agent.job_queue import create_worker_pool
+from app.services.agent.llm import close_client as close_llm_client
+
+
+async def run() -> None:
+    init_db()
+
+    pool = create_worker_pool()
+    await pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    await pool.stop()
+    await close_llm_client()
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run())
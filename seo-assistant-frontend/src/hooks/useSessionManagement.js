@@ -147,28 +147,44 @@ export const useSessionManagement = (auth0Client) => {
     }
   };
 
+  const MAX_POLL_FAILURES = 5;
+
   const pollJobStatus = async (jobId) => {
-    const pollInterval = setInterval(async () => {
+    const stopGenerating = () => {
+      setIsGenerating(false);
+      setCurrentJobId(null);
+    };
+
+    // Long-poll: the server holds each request until the job finishes or the wait expires
+    let failures = 0;
+    while (true) {
       try {
-        const data = await apiService.getJobStatus(jobId);
+        const data = await apiService.getJobStatus(jobId, 25);
+        failures = 0;
 
         if (data.status === 'completed') {
-          clearInterval(pollInterval);
-          setIsGenerating(false);
-          setCurrentJobId(null);
+          stopGenerating();
 
           const agentMessage = createAgentMessage(data.agent_message);
           setMessages(prev => [...prev, agentMessage]);
-        } else if (data.status === 'failed') {
-          clearInterval(pollInterval);
-          setIsGenerating(false);
-          setCurrentJobId(null);
-          console.error('Job failed:', data.error_message);
+          return;
+        } else if (data.status !== 'pending' && data.status !== 'generating') {
+          stopGenerating();
+          console.error('Job failed:', data.error_message || data.status);
+          return;
         }
       } catch (error) {
         console.error('Error polling job status:', error);
+
+        // 4xx means the job is gone or not ours (e.g. its session was deleted); retrying won't help
+        failures += 1;
+        if ((error.status >= 400 && error.status < 500) || failures >= MAX_POLL_FAILURES) {
+          stopGenerating();
+          return;
+        }
+        await new Promise(resolve => setTimeout(resolve, 2000 * failures));
       }
-    }, 2000);
+    }
   };
 
   const updateSession = async (sessionId, title) => {
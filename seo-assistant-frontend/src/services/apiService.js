@@ -26,7 +26,8 @@ export class ApiService {
       throw new Error('Failed to fetch sessions');
     }
     
-    return await response.json();
+    const page = await response.json();
+    return page.items;
   }
 
   async createSession(message) {
@@ -67,17 +68,29 @@ export class ApiService {
 
   async fetchSessionMessages(sessionId) {
     const token = await this.getToken();
-    const response = await fetch(`${API_URL}/sessions/${sessionId}/messages`, {
-      headers: {
-        Authorization: `Bearer ${token}`
+    let messages = [];
+    let cursor = null;
+
+    // The first page holds the latest messages; next_cursor pages back
+    // through older history, so each page goes in front of the last
+    do {
+      const query = cursor ? `?before=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${API_URL}/sessions/${sessionId}/messages${query}`, {
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
+      });
+
+      if (!response.ok) {
+        throw new Error('Failed to fetch session messages');
       }
-    });
 
-    if (!response.ok) {
-      throw new Error('Failed to fetch session messages');
-    }
+      const page = await response.json();
+      messages = [...page.items, ...messages];
+      cursor = page.next_cursor;
+    } while (cursor);
 
-    return await response.json();
+    return messages;
   }
 
   async updateSession(sessionId, title) {
@@ -114,16 +127,18 @@ export class ApiService {
     return response.ok;
   }
 
-  async getJobStatus(jobId) {
+  async getJobStatus(jobId, wait = 0) {
     const token = await this.getToken();
-    const response = await fetch(`${API_URL}/jobs/${jobId}/status`, {
+    const response = await fetch(`${API_URL}/jobs/${jobId}/status?wait=${wait}`, {
       headers: {
         Authorization: `Bearer ${token}`
       }
     });
 
     if (!response.ok) {
-      throw new Error('Failed to get job status');
+      const error = new Error('Failed to get job status');
+      error.status = response.status;
+      throw error;
     }
 
     return await response.json();